@@ -0,0 +1,79 @@
+import math
+from bisect import bisect_left
+from datetime import datetime, timezone
+
+BUCKET_SECONDS = {"hourly": 3600, "daily": 86400}
+KERNELS = ("linear", "exponential")
+
+def bucket_start(timestamp, bucket):
+    """Returns the start of the UTC hour or day containing timestamp."""
+    size = BUCKET_SECONDS[bucket]
+    return math.floor(timestamp / size) * size
+
+def kernel_weight(age, kernel, decay, half_life):
+    """
+    Weight of a bucket that is age buckets old. The linear kernel loses decay per bucket
+    (never going below zero), the exponential one halves every half_life buckets.
+    """
+    if kernel == "linear":
+        return max(0.0, 1 - age * decay)
+    return 0.5 ** (age / half_life)
+
+class ScoreIndex:
+    """
+    The sentiment scores of one ticker sorted by publication time, with prefix sums, so the
+    sum and count of any time range take two binary searches.
+    """
+
+    def __init__(self, news_list):
+        points = []
+        for item in news_list:
+            if isinstance(item, dict) and 'date' in item and 'sentiment-score' in item:
+                try:
+                    item_date = datetime.fromisoformat(item['date'].replace('Z', '+00:00'))
+                except (AttributeError, ValueError):
+                    continue
+                points.append((item_date.timestamp(), item["sentiment-score"]))
+        points.sort()
+        self.timestamps = [timestamp for timestamp, _ in points]
+        self.prefix_sums = [0.0]
+        for _, score in points:
+            self.prefix_sums.append(self.prefix_sums[-1] + score)
+
+    def range_stats(self, start, end):
+        """Returns the sum and count of the scores published in [start, end)."""
+        lo = bisect_left(self.timestamps, start)
+        hi = bisect_left(self.timestamps, end)
+        return self.prefix_sums[hi] - self.prefix_sums[lo], hi - lo
+
+    def window_stats(self, current_bucket_start, window, bucket, kernel="linear", decay=0.15, half_life=1.0):
+        """
+        Computes per-bucket averages for the window buckets ending with the one starting at
+        current_bucket_start (newest first), and the plain and kernel-weighted averages over them.
+        """
+        size = BUCKET_SECONDS[bucket]
+        buckets = []
+        total_sum = 0.0
+        total_count = 0
+        weighted_sum = 0.0
+        total_weight = 0.0
+        for age in range(window):
+            start = current_bucket_start - age * size
+            score_sum, count = self.range_stats(start, start + size)
+            weight = kernel_weight(age, kernel, decay, half_life)
+            total_sum += score_sum
+            total_count += count
+            weighted_sum += score_sum * weight
+            total_weight += count * weight
+            buckets.append({
+                "start": datetime.fromtimestamp(start, timezone.utc).isoformat().replace('+00:00', 'Z'),
+                "count": count,
+                "average_sentiment": score_sum / count if count else 0,
+                "weight": weight,
+            })
+        return {
+            "total_news": total_count,
+            "average_sentiment": total_sum / total_count if total_count else 0,
+            "weighted_average_sentiment": weighted_sum / total_weight if total_weight else 0,
+            "buckets": buckets,
+        }
@@ -1,8 +1,17 @@
-from fastapi import FastAPI, HTTPException, Path, Query
+from fastapi import FastAPI, HTTPException, Path, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
 import os
 import json
 import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import List, Literal, Optional
+from snapshot import SnapshotReader
+from search_index import SearchIndex, MappedSearchIndex
+from aggregates import ScoreIndex, bucket_start
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
 
@@ -17,11 +26,181 @@ app.add_middleware(
 )
 
 API_KEY = "twetArxt5425AgesR"  # IMPORTANT: DO NOT DO THIS IN PRODUCTION!
+AGGREGATE_CACHE_SIZE = 512
+READ_POOL_WORKERS = 4
+MAX_IN_FLIGHT_LOADS = 64  # distinct loads running or queued before new ones are shed
+RETRY_AFTER_SECONDS = 1
+
+_snapshot_reader = None
+_search_index_cache = None
+_score_indexes = {}
+_read_pool = ThreadPoolExecutor(max_workers=READ_POOL_WORKERS, thread_name_prefix="file-read")
+_in_flight = {}
+_load_stats = {"requests": 0, "loads": 0, "coalesced": 0, "shed": 0}
+_pool_counts = {"queued": 0, "running": 0}
+_pool_lock = threading.Lock()
 
 async def verify_api_key(api_key: str):
     if api_key != API_KEY:
         raise HTTPException(status_code=401, detail="Invalid API Key")
 
+def _read_json(filepath: str):
+    """Reads and parses a JSON file."""
+    with open(filepath, "r") as f:
+        return json.load(f)
+
+def _run_counted(func, *args):
+    """Runs func(*args) on a read pool thread, moving it from the queued to the running count."""
+    with _pool_lock:
+        _pool_counts["queued"] -= 1
+        _pool_counts["running"] += 1
+    try:
+        return func(*args)
+    finally:
+        with _pool_lock:
+            _pool_counts["running"] -= 1
+
+async def _single_flight(key, func, *args):
+    """
+    Runs func(*args) on the dedicated read pool. Concurrent callers with the same key share
+    one run and its result (or exception). New runs are refused with 503 and a Retry-After
+    header while MAX_IN_FLIGHT_LOADS runs are already pending.
+    """
+    _load_stats["requests"] += 1
+    future = _in_flight.get(key)
+    if future is not None:
+        _load_stats["coalesced"] += 1
+        return await asyncio.shield(future)
+
+    if len(_in_flight) >= MAX_IN_FLIGHT_LOADS:
+        _load_stats["shed"] += 1
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy, please retry later",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+        )
+
+    _load_stats["loads"] += 1
+    with _pool_lock:
+        _pool_counts["queued"] += 1
+    future = asyncio.get_running_loop().run_in_executor(_read_pool, _run_counted, func, *args)
+    _in_flight[key] = future
+    # Cleaned up on completion rather than in a finally block, so a disconnecting
+    # first caller does not detach the load from the callers still waiting on it.
+    future.add_done_callback(lambda _: _in_flight.pop(key, None))
+    return await asyncio.shield(future)
+
+def _current_snapshot():
+    """Returns the snapshot published by the collector, or None to fall back to the JSON files."""
+    global _snapshot_reader
+    snapshot_dir = os.path.join(script_dir, "..", "data", "snapshot")
+    if _snapshot_reader is None or _snapshot_reader.snapshot_dir != snapshot_dir:
+        _snapshot_reader = SnapshotReader(snapshot_dir)
+    return _snapshot_reader.current()
+
+def _snapshot_response(snapshot, key: str, not_found_detail: str):
+    """Serves a payload straight from the memory-mapped snapshot without parsing it."""
+    payload = snapshot.get(key)
+    if payload is None:
+        raise HTTPException(status_code=404, detail=not_found_detail)
+    return Response(content=payload, media_type="application/json")
+
+def _load_search_index():
+    """
+    Returns the search index. With a snapshot, its search section is queried in place, so all
+    workers share it. Otherwise the index file written by the collector is loaded, or, before
+    there is one, an index is built from the stored news files and rebuilt when they change.
+    """
+    global _search_index_cache
+    snapshot = _current_snapshot()
+    if snapshot is not None and snapshot.get("search") is not None:
+        version = (snapshot.path, snapshot.generation)
+        if _search_index_cache is None or _search_index_cache[0] != version:
+            _search_index_cache = (version, MappedSearchIndex(snapshot.get("search")))
+        return _search_index_cache[1]
+
+    index_file = os.path.join(script_dir, "..", "data", "search_index.json")
+    news_dir = os.path.join(script_dir, "..", "data", "news_data")
+    try:
+        version = (index_file, os.stat(index_file).st_mtime_ns)
+    except FileNotFoundError:
+        names = sorted(os.listdir(news_dir)) if os.path.isdir(news_dir) else []
+        version = (news_dir, tuple((name, os.stat(os.path.join(news_dir, name)).st_mtime_ns) for name in names))
+    if _search_index_cache is None or _search_index_cache[0] != version:
+        if version[0] == news_dir:
+            index = SearchIndex()
+            if os.path.isdir(news_dir):
+                index.sync_directory(news_dir)
+        else:
+            index = SearchIndex.load(index_file)
+        _search_index_cache = (version, index)
+    return _search_index_cache[1]
+
+def _to_timestamp(value: Optional[datetime]):
+    """Converts a query datetime to a POSIX timestamp, treating naive values as UTC."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+def _get_score_index(ticker: str):
+    """
+    Returns the time-sorted score index of a ticker, or None if there is no data for it.
+    The index is rebuilt only when the snapshot generation or the news file changes.
+    """
+    key = f"news/{ticker}"
+    snapshot = _current_snapshot()
+    if snapshot is not None:
+        if snapshot.get(key) is None:
+            return None
+        version = (snapshot.path, snapshot.generation)
+    else:
+        filepath = os.path.join(script_dir, "..", "data", "news_data", f"{ticker}_news.json")
+        try:
+            version = (filepath, os.stat(filepath).st_mtime_ns)
+        except FileNotFoundError:
+            return None
+
+    cached = _score_indexes.get(ticker)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    if snapshot is not None:
+        data = json.loads(bytes(snapshot.get(key)))
+    else:
+        with open(version[0], "r") as f:
+            data = json.load(f)
+    score_index = ScoreIndex(data.get("news", []))
+    _score_indexes[ticker] = (version, score_index)
+    return score_index
+
+def _list_tickers():
+    """Returns the lowercase tickers that have stored news."""
+    snapshot = _current_snapshot()
+    if snapshot is not None:
+        return sorted(key[len("news/"):] for key in snapshot.keys() if key.startswith("news/"))
+    news_dir = os.path.join(script_dir, "..", "data", "news_data")
+    if not os.path.isdir(news_dir):
+        return []
+    return sorted(name[:-len("_news.json")] for name in os.listdir(news_dir) if name.endswith("_news.json"))
+
+@lru_cache(maxsize=AGGREGATE_CACHE_SIZE)
+def _cached_window_stats(score_index: ScoreIndex, current_bucket_start: float, window: int, bucket: str, kernel: str, decay: float, half_life: float):
+    """Memoizes window statistics; a rebuilt score index or a new bucket gives a new cache key."""
+    return score_index.window_stats(current_bucket_start, window, bucket, kernel, decay, half_life)
+
+def _compute_aggregates(tickers, window, bucket, kernel, decay, half_life):
+    """Computes the window statistics of the given tickers, skipping tickers without data."""
+    current_bucket_start = bucket_start(time.time(), bucket)
+    results = []
+    for ticker in tickers:
+        score_index = _get_score_index(ticker)
+        if score_index is None:
+            continue
+        stats = _cached_window_stats(score_index, current_bucket_start, window, bucket, kernel, decay, half_life)
+        results.append({"ticker": ticker.upper(), "window": window, "bucket": bucket, "kernel": kernel, **stats})
+    return results
+
 @app.get("/data/{ticker}")
 async def get_ticker_news(
     ticker: str = Path(..., title="Stock ticker symbol"),
@@ -32,19 +211,20 @@ async def get_ticker_news(
     """
     await verify_api_key(api_key)
 
-    
+    snapshot = _current_snapshot()
+    if snapshot is not None:
+        return _snapshot_response(snapshot, f"news/{ticker.lower()}", "News data not found for this ticker")
+
     filepath = os.path.join(script_dir,"..", "data","news_data", f"{ticker.lower()}_news.json")
 
     if not os.path.exists(filepath):
         raise HTTPException(status_code=404, detail="News data not found for this ticker")
 
     try:
-        loop = asyncio.get_event_loop()
-        with open(filepath, "r") as f:
-            content = await loop.run_in_executor(None, f.read)
-        data = json.loads(content)
-        return data
+        return await _single_flight(filepath, _read_json, filepath)
 
+    except HTTPException:
+        raise
     except json.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Invalid JSON format in news data")
     except Exception as e:
@@ -57,18 +237,20 @@ async def get_stock_list(api_key: str = Query(..., title="API Key")):
     """
     await verify_api_key(api_key)
 
+    snapshot = _current_snapshot()
+    if snapshot is not None:
+        return _snapshot_response(snapshot, "stock", "Stock list file not found")
+
     filepath = os.path.join(script_dir, "..", "data", "stocklist.json")
 
     if not os.path.exists(filepath):
         raise HTTPException(status_code=404, detail="Stock list file not found")
 
     try:
-        loop = asyncio.get_event_loop()
-        with open(filepath, "r") as f:
-            content = await loop.run_in_executor(None, f.read)
-        data = json.loads(content)
-        return data
+        return await _single_flight(filepath, _read_json, filepath)
 
+    except HTTPException:
+        raise
     except json.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Invalid JSON format in stock list")
     except Exception as e:
@@ -81,19 +263,122 @@ async def get_recommendations(api_key: str = Query(..., title="API Key")):
     """
     await verify_api_key(api_key)
 
+    snapshot = _current_snapshot()
+    if snapshot is not None:
+        return _snapshot_response(snapshot, "recommendations", "Recommendations file not found")
+
     filepath = os.path.join(script_dir, "..", "data", "recommendations.json")
 
     if not os.path.exists(filepath):
         raise HTTPException(status_code=404, detail="Recommendations file not found")
 
     try:
-        loop = asyncio.get_event_loop()
-        with open(filepath, "r") as f:
-            content = await loop.run_in_executor(None, f.read)
-        data = json.loads(content)
-        return data
+        return await _single_flight(filepath, _read_json, filepath)
 
+    except HTTPException:
+        raise
     except json.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Invalid JSON format in stock list")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"An error occurred: {e}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"An error occurred: {e}")
+
+@app.get("/search")
+async def search_news(
+    q: str = Query(..., min_length=1, title="Search terms, use double quotes for phrases"),
+    ticker: Optional[List[str]] = Query(None, title="Only search the news of these tickers"),
+    start: Optional[datetime] = Query(None, title="Earliest article date"),
+    end: Optional[datetime] = Query(None, title="Latest article date"),
+    limit: int = Query(20, ge=1, le=100, title="Maximum number of returned articles"),
+    api_key: str = Query(..., title="API Key"),
+):
+    """
+    Searches the stored news summaries for articles matching all terms and phrases of the query.
+    """
+    await verify_api_key(api_key)
+
+    try:
+        index = await _single_flight("search_index", _load_search_index)
+        result = index.search(q, ticker, _to_timestamp(start), _to_timestamp(end), limit)
+        return {"query": q, **result}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An error occurred: {e}")
+
+@app.get("/aggregates")
+async def get_all_aggregates(
+    window: int = Query(7, ge=1, le=720, title="Number of buckets, counting back from the current one"),
+    bucket: Literal["hourly", "daily"] = Query("daily", title="Bucket size"),
+    kernel: Literal["linear", "exponential"] = Query("linear", title="Decay kernel of the weighted average"),
+    decay: float = Query(0.15, ge=0, le=1, title="Weight lost per bucket by the linear kernel"),
+    half_life: float = Query(1.0, gt=0, title="Half-life in buckets of the exponential kernel"),
+    api_key: str = Query(..., title="API Key"),
+):
+    """
+    Computes windowed sentiment statistics for every ticker with stored news.
+    """
+    await verify_api_key(api_key)
+
+    try:
+        return await _single_flight(
+            ("aggregates", window, bucket, kernel, decay, half_life),
+            lambda: _compute_aggregates(_list_tickers(), window, bucket, kernel, decay, half_life)
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An error occurred: {e}")
+
+@app.get("/aggregates/{ticker}")
+async def get_ticker_aggregates(
+    ticker: str = Path(..., title="Stock ticker symbol"),
+    window: int = Query(7, ge=1, le=720, title="Number of buckets, counting back from the current one"),
+    bucket: Literal["hourly", "daily"] = Query("daily", title="Bucket size"),
+    kernel: Literal["linear", "exponential"] = Query("linear", title="Decay kernel of the weighted average"),
+    decay: float = Query(0.15, ge=0, le=1, title="Weight lost per bucket by the linear kernel"),
+    half_life: float = Query(1.0, gt=0, title="Half-life in buckets of the exponential kernel"),
+    api_key: str = Query(..., title="API Key"),
+):
+    """
+    Computes windowed sentiment statistics for a specific stock ticker.
+    """
+    await verify_api_key(api_key)
+
+    try:
+        results = await _single_flight(
+            ("aggregates", ticker.lower(), window, bucket, kernel, decay, half_life),
+            lambda: _compute_aggregates([ticker.lower()], window, bucket, kernel, decay, half_life)
+        )
+
+    except HTTPException:
+        raise
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=500, detail="Invalid JSON format in news data")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An error occurred: {e}")
+
+    if not results:
+        raise HTTPException(status_code=404, detail="News data not found for this ticker")
+    return results[0]
+
+@app.get("/metrics")
+async def get_metrics(api_key: str = Query(..., title="API Key")):
+    """
+    Reports the load counters of the file read pool of this worker process.
+    """
+    await verify_api_key(api_key)
+
+    requests = _load_stats["requests"]
+    with _pool_lock:
+        queued, running = _pool_counts["queued"], _pool_counts["running"]
+    return {
+        "read_pool_workers": READ_POOL_WORKERS,
+        "max_in_flight_loads": MAX_IN_FLIGHT_LOADS,
+        "in_flight_loads": len(_in_flight),
+        "queue_depth": queued,
+        "running_loads": running,
+        **_load_stats,
+        "coalescing_ratio": _load_stats["coalesced"] / requests if requests else 0,
+    }
\ No newline at end of file
@@ -0,0 +1,125 @@
+import argparse
+import json
+import os
+import time
+from news_collector import _build_ticker_data, _save_json_atomic, give_recommendations
+from sentiment_analyser import SentimentAnalyzer, SCORING_VERSION
+from snapshot import publish_snapshot
+from search_index import SearchIndex
+from data_lock import data_lock, LockHeldError
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+def _load_checkpoint(checkpoint_file):
+    """Loads the set of tickers already re-scored for the current scoring version."""
+    if not os.path.exists(checkpoint_file):
+        return set()
+    with open(checkpoint_file, "r") as f:
+        try:
+            checkpoint = json.load(f)
+        except json.JSONDecodeError:
+            print(f"Warning: Checkpoint {checkpoint_file} is corrupted. Starting over.")
+            return set()
+    if checkpoint.get("scoring_version") != SCORING_VERSION:
+        print(f"Checkpoint was written for {checkpoint.get('scoring_version')}, starting over for {SCORING_VERSION}.")
+        return set()
+    return set(checkpoint.get("completed", []))
+
+def _save_checkpoint(checkpoint_file, completed):
+    """Records the tickers that are done, so an interrupted run can resume."""
+    _save_json_atomic(checkpoint_file, {"scoring_version": SCORING_VERSION, "completed": sorted(completed)})
+
+def rescore_ticker_file(news_file, analyzer, batch_size, force=False):
+    """
+    Re-scores the stored summaries of one ticker and rewrites its scores and aggregates.
+    Articles already scored with the current version are left alone unless force is set.
+    Returns the number of re-scored articles.
+    """
+    with open(news_file, "r") as f:
+        data = json.load(f)
+    all_news = data.get("news", [])
+
+    stale_items = [
+        item for item in all_news
+        if isinstance(item, dict) and "summary" in item
+        and (force or item.get("scoring-version") != SCORING_VERSION)
+    ]
+    if not stale_items:
+        return 0
+
+    scores = analyzer.analyze_sentiments([item["summary"] for item in stale_items], batch_size=batch_size)
+    for item, score in zip(stale_items, scores):
+        item["sentiment-score"] = score
+        item["scoring-version"] = SCORING_VERSION
+
+    _save_json_atomic(news_file, _build_ticker_data(data.get("ticker", ""), all_news))
+    return len(stale_items)
+
+def backfill_scores(analyzer, news_dir, checkpoint_file, batch_size=32, force=False):
+    """
+    Re-scores every stored news file in news_dir, one ticker at a time, checkpointing after each.
+    The checkpoint is removed once all tickers are done; if any ticker failed it is kept,
+    so the next run only retries the failed tickers.
+    """
+    completed = _load_checkpoint(checkpoint_file)
+    news_files = sorted(name for name in os.listdir(news_dir) if name.endswith("_news.json"))
+    total_rescored = 0
+    failed = []
+
+    for name in news_files:
+        if name in completed:
+            continue
+        news_file = os.path.join(news_dir, name)
+        try:
+            rescored = rescore_ticker_file(news_file, analyzer, batch_size, force)
+            total_rescored += rescored
+            print(f"{rescored} news summaries re-scored in {news_file}")
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"Error re-scoring {news_file}: {e}")
+            failed.append(name)
+            continue
+        completed.add(name)
+        _save_checkpoint(checkpoint_file, completed)
+
+    if failed:
+        print(f"Backfill incomplete: {total_rescored} news summaries re-scored with {SCORING_VERSION}, "
+              f"{len(failed)} files failed ({', '.join(failed)}). Run the backfill again to retry them.")
+        return total_rescored
+    if os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
+    print(f"Backfill finished: {total_rescored} news summaries re-scored with {SCORING_VERSION}")
+    return total_rescored
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-score all stored news summaries with the current sentiment model and formula.")
+    parser.add_argument("--batch-size", type=int, default=32, help="Number of summaries scored per model call (default: 32)")
+    parser.add_argument("--force", action='store_true', help="Re-score articles already tagged with the current scoring version (default: False)")
+    parser.add_argument("--restart", action='store_true', help="Ignore any existing checkpoint and start from the first ticker (default: False)")
+    args = parser.parse_args()
+
+    news_dir = os.path.join(script_dir, "..", "data", "news_data")
+    checkpoint_file = os.path.join(script_dir, "..", "data", "backfill_checkpoint.json")
+    if args.restart and os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
+
+    try:
+        # The collector rewrites ticker files from its own earlier read, so never overlap with it.
+        with data_lock(blocking=False):
+            start_time = time.time()
+            analyzer = SentimentAnalyzer()
+            backfill_scores(analyzer, news_dir, checkpoint_file, args.batch_size, args.force)
+            del analyzer
+            index_file = os.path.join(script_dir, "..", "data", "search_index.json")
+            search_index = SearchIndex.load(index_file)
+            search_index.sync_directory(news_dir)
+            search_index.save(index_file)
+            stocklist_filepath = os.path.join(script_dir, "..", "data", "stocklist.json")
+            with open(stocklist_filepath, "r") as f:
+                stock_data = json.load(f)
+            give_recommendations(stock_data)
+            publish_snapshot(os.path.join(script_dir, "..", "data"))
+            print(f"Backfill took {time.time() - start_time:.1f}s")
+    except LockHeldError:
+        print("Error: A collection run is in progress. Start the backfill again once it has finished.")
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"Error: {e}")
@@ -0,0 +1,53 @@
+import os
+import time
+from contextlib import contextmanager
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+LOCK_FILE = os.path.join(script_dir, "..", "data", "collector.lock")
+
+class LockHeldError(Exception):
+    """Raised when the data lock is held by another process and waiting was not requested."""
+
+def _try_lock(f):
+    """Takes an exclusive OS lock on the open file without waiting; returns whether it succeeded."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+def _unlock(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+@contextmanager
+def data_lock(lock_file=LOCK_FILE, blocking=True, poll_interval=1.0):
+    """
+    Serializes the processes that rewrite the ticker files (the collector and the backfill).
+    The lock is held by the OS, so it is released even if the holder crashes.
+    If blocking is False, LockHeldError is raised instead of waiting for the holder.
+    """
+    f = open(lock_file, "a+")
+    try:
+        while not _try_lock(f):
+            if not blocking:
+                raise LockHeldError(f"{lock_file} is held by another process")
+            time.sleep(poll_interval)
+        try:
+            yield
+        finally:
+            _unlock(f)
+    finally:
+        f.close()
@@ -10,17 +10,27 @@ async def run_scheduler():
     scheduler_path = os.path.join(script_dir, "collection_scheduler.py")
     await asyncio.create_subprocess_exec("python", scheduler_path)
 
-async def run_api(host: str, port: int, reload: bool):
+async def run_api(host: str, port: int, reload: bool, workers: int):
     """Runs the uvicorn server."""
+    if workers > 1:
+        # uvicorn only forks workers from its own supervisor, so run it as a separate process.
+        # The workers share the memory-mapped snapshot published by the collector.
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        process = await asyncio.create_subprocess_exec(
+            "python", "-m", "uvicorn", "api_handler:app", "--app-dir", script_dir,
+            "--host", host, "--port", str(port), "--workers", str(workers)
+        )
+        await process.wait()
+        return
     config = uvicorn.Config("api_handler:app", host=host, port=port, reload=reload)
     server = uvicorn.Server(config)
     await server.serve()
 
-async def main(host: str, port: int, reload: bool):
+async def main(host: str, port: int, reload: bool, workers: int):
     """Runs both the scheduler and the API concurrently."""
     await asyncio.gather(
         run_scheduler(),
-        run_api(host, port, reload)
+        run_api(host, port, reload, workers)
     )
 
 if __name__ == "__main__":
@@ -28,6 +38,9 @@ if __name__ == "__main__":
     parser.add_argument("--host", default="0.0.0.0", help="Host to bind the API server to (default: 0.0.0.0)")
     parser.add_argument("--port", type=int, default=8091, help="Port to listen on (default: 8091)")
     parser.add_argument("--reload", action='store_true', help="Enable auto-reloading (default: False)")
+    parser.add_argument("--workers", type=int, default=1, help="Number of API worker processes, cannot be combined with --reload (default: 1)")
     args = parser.parse_args()
+    if args.workers > 1 and args.reload:
+        parser.error("--workers cannot be combined with --reload")
 
-    asyncio.run(main(args.host, args.port, args.reload))
\ No newline at end of file
+    asyncio.run(main(args.host, args.port, args.reload, args.workers))
\ No newline at end of file
@@ -1,9 +1,12 @@
-import yfinance as yf
 import json
 import os
 from datetime import datetime, timedelta, timezone
 import pytz
-from sentiment_analyser import SentimentAnalyzer
+from sentiment_analyser import SentimentAnalyzer, SCORING_VERSION
+from snapshot import publish_snapshot
+from search_index import SearchIndex
+from news_fetcher import NewsFetcher, FetchError
+from data_lock import data_lock
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
 
@@ -31,65 +34,98 @@ def _load_and_filter_existing_news(output_file, cutoff_date_utc):
             filtered_existing_news.append(item)
     return filtered_existing_news
 
-def _fetch_and_process_new_news(ticker_symbol, analyzer, cutoff_date_utc, existing_ids):
+def _fetch_and_process_new_news(ticker_symbol, analyzer, cutoff_date_utc, existing_ids, fetcher):
     """Fetches new news, processes it, and calculates sentiment."""
     new_news = []
     new_count = 0
-    stock = yf.Ticker(ticker_symbol)
-    news = stock.news
+    news = fetcher.fetch(ticker_symbol)
     if news:
         for article in news:
-            id = article['id']
-            pub_date_str = article['content']['pubDate']
-            pub_date = datetime.fromisoformat(pub_date_str.replace('Z', '+00:00'))
-            if pub_date >= cutoff_date_utc and id not in existing_ids:
+            try:
+                id = article['id']
+                pub_date_str = article['content']['pubDate']
+                pub_date = datetime.fromisoformat(pub_date_str.replace('Z', '+00:00'))
                 summary = article['content']['summary']
+            except (KeyError, TypeError, ValueError, AttributeError) as e:
+                print(f"Warning: Skipping malformed article for {ticker_symbol}: {type(e).__name__}: {e}")
+                continue
+            if pub_date >= cutoff_date_utc and id not in existing_ids:
                 sentiment_score = analyzer.analyze_sentiment(summary)
-                new_news.append({"id": id, "summary": summary, "date": pub_date_str, "sentiment-score": sentiment_score})
+                new_news.append({"id": id, "summary": summary, "date": pub_date_str, "sentiment-score": sentiment_score, "scoring-version": SCORING_VERSION})
                 new_count += 1
     return new_news, new_count
 
-def get_stock_news_json(ticker_symbol, analyzer, cutoff_date_utc):
+def get_stock_news_json(ticker_symbol, analyzer, cutoff_date_utc, fetcher, search_index=None):
     """
     Retrieves news summaries for a stock, filters existing news, and saves them to a structured JSON file.
+    If fetching fails, the existing news are still filtered and saved. Malformed articles are skipped;
+    any other error marks the ticker as failed in the fetch summary.
+    If a search index is given, it is updated with the new and expired articles of the stock.
     """
     try:
         output_file = os.path.join(script_dir,"..", "data","news_data", f"{ticker_symbol.lower()}_news.json")
         filtered_existing_news = _load_and_filter_existing_news(output_file, cutoff_date_utc)
         existing_ids = {item['id'] for item in filtered_existing_news if isinstance(item, dict) and 'id' in item}
-        new_news, new_count = _fetch_and_process_new_news(ticker_symbol, analyzer, cutoff_date_utc, existing_ids)
+        try:
+            new_news, new_count = _fetch_and_process_new_news(ticker_symbol, analyzer, cutoff_date_utc, existing_ids, fetcher)
+        except FetchError as e:
+            print(f"Warning: No new news fetched for {ticker_symbol}: {e.reason} ({e.outcome})")
+            new_news, new_count = [], 0
         all_news = filtered_existing_news + new_news
-        sentiment_scores = [item["sentiment-score"] for item in all_news if isinstance(item, dict) and "sentiment-score" in item]
-        average_sentiment = sum(sentiment_scores) / len(sentiment_scores) if all_news and sentiment_scores else 0
-        weighted_average = _calculate_weighted_average(all_news)
-        average_daily_sentiments = _calculate_average_daily_sentiments(all_news)
-        data_to_save = {
-            "ticker": ticker_symbol,
-            "total_news": len(all_news),
-            "average_sentiment": average_sentiment,
-            "weighted_average_sentiment": weighted_average,
-            "average_daily_sentiments": average_daily_sentiments,
-            "news": all_news,
-        }
-        with open(output_file, "w") as f:
-            json.dump(data_to_save, f, indent=4)
+        data_to_save = _build_ticker_data(ticker_symbol, all_news)
+        _save_json_atomic(output_file, data_to_save)
         print(f"{new_count} new news summaries for {ticker_symbol} saved to {output_file}")
+        if search_index is not None:
+            search_index.sync_ticker(ticker_symbol, all_news)
     except Exception as e:
-        print(f"An error occurred: {e}")
+        print(f"An error occurred for {ticker_symbol}: {e}")
+        fetcher.record_failure(ticker_symbol, f"{type(e).__name__}: {e}")
+
+def _build_ticker_data(ticker_symbol, all_news):
+    """Builds the per-ticker document with its sentiment aggregates."""
+    sentiment_scores = [item["sentiment-score"] for item in all_news if isinstance(item, dict) and "sentiment-score" in item]
+    average_sentiment = sum(sentiment_scores) / len(sentiment_scores) if all_news and sentiment_scores else 0
+    weighted_average = _calculate_weighted_average(all_news)
+    average_daily_sentiments = _calculate_average_daily_sentiments(all_news)
+    return {
+        "ticker": ticker_symbol,
+        "total_news": len(all_news),
+        "average_sentiment": average_sentiment,
+        "weighted_average_sentiment": weighted_average,
+        "average_daily_sentiments": average_daily_sentiments,
+        "news": all_news,
+    }
+
+def _save_json_atomic(output_file, data):
+    """Writes JSON to a temporary file and swaps it in, so readers never see a partial file."""
+    temp_file = f"{output_file}.tmp"
+    with open(temp_file, "w") as f:
+        json.dump(data, f, indent=4)
+    os.replace(temp_file, output_file)
 
-def process_stock_data(json_data, max_age_days):
+def process_stock_data(json_data, max_age_days, fetcher=None):
     """
     Loops through the stock list, gathers the news for each ticker.
+    Ends with a summary of the tickers whose news were late, failed or skipped, and returns it.
     """
+    if fetcher is None:
+        fetcher = NewsFetcher()
+    fetcher.start_cycle()
     analyzer = SentimentAnalyzer()
+    index_file = os.path.join(script_dir, "..", "data", "search_index.json")
+    search_index = SearchIndex.load(index_file)
     eastern = pytz.timezone('US/Eastern')
     now_eastern = datetime.now(eastern)
     cutoff_eastern = now_eastern - timedelta(days=max_age_days)
     cutoff_utc = cutoff_eastern.astimezone(timezone.utc)
     for stock in json_data:
         ticker = stock["ticker"]
-        get_stock_news_json(ticker, analyzer, cutoff_utc)
+        get_stock_news_json(ticker, analyzer, cutoff_utc, fetcher, search_index)
+    search_index.save(index_file)
+    print(f"Search index with {len(search_index.docs)} news summaries saved to {index_file}")
     del analyzer
+    fetcher.close()
+    return fetcher.print_summary()
 
 def _calculate_weighted_average(news_list):
     """Calculates the weighted average of sentiment scores, downgrading weight by 15% daily."""
@@ -159,8 +195,7 @@ def give_recommendations(stock_data):
         "top_5_worst": top_5_worst
     }
 
-    with open(recommendations_file, "w") as f:
-        json.dump(recommendations, f, indent=4)
+    _save_json_atomic(recommendations_file, recommendations)
 
     print(f"Recommendations saved to {recommendations_file}")
 
@@ -170,8 +205,11 @@ if __name__ == "__main__":
         stocklist_filepath = os.path.join(script_dir, "..", "data", "stocklist.json")
         with open(stocklist_filepath, "r") as f:
             stock_data = json.load(f)
-        process_stock_data(stock_data, max_age_days)
-        give_recommendations(stock_data)
+        # Waits for a running backfill, so neither overwrites the other's ticker files.
+        with data_lock():
+            process_stock_data(stock_data, max_age_days)
+            give_recommendations(stock_data)
+            publish_snapshot(os.path.join(script_dir, "..", "data"))
     except (FileNotFoundError, json.JSONDecodeError) as e:
         print(f"Error: {e}")
     except Exception as e:
@@ -0,0 +1,238 @@
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+import yfinance as yf
+from curl_cffi import requests as curl_requests
+
+class FetchError(Exception):
+    """Raised when the news of a ticker could not be fetched; outcome is "late", "failed" or "skipped"."""
+
+    def __init__(self, ticker, outcome, reason):
+        super().__init__(f"{ticker} {outcome}: {reason}")
+        self.ticker = ticker
+        self.outcome = outcome
+        self.reason = reason
+
+class CappedSession(curl_requests.Session):
+    """
+    A curl_cffi session that caps the timeout of every request at max_timeout seconds, also
+    for the requests yfinance sends with its own 30s timeout, so each HTTP request of an
+    abandoned fetch still gives up and closes its socket within max_timeout.
+    """
+
+    def __init__(self, max_timeout, **kwargs):
+        super().__init__(timeout=max_timeout, **kwargs)
+        self.max_timeout = max_timeout
+
+    def request(self, method, url, *args, **kwargs):
+        timeout = kwargs.get("timeout")
+        if not isinstance(timeout, (int, float)) or timeout > self.max_timeout:
+            kwargs["timeout"] = self.max_timeout
+        return super().request(method, url, *args, **kwargs)
+
+class _FetchWorker:
+    """
+    A long-lived daemon thread that runs fetches one at a time, so the session's curl handle for
+    this thread, and its connections, are reused across tickers. Being a daemon, a worker stuck in
+    a hung call never holds up the exit of the process.
+    """
+
+    def __init__(self):
+        self._jobs = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self._run, name="news-fetch", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            future, func, args = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(func(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def submit(self, func, *args):
+        future = Future()
+        self._jobs.put((future, func, args))
+        return future
+
+    def stop(self):
+        """Lets the thread exit once its current call returns, without waiting for it."""
+        self._jobs.put(None)
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failed tickers, so the rest of the cycle does not
+    wait on a source that is down. After reset_timeout seconds a single probe is let through;
+    its success closes the breaker again, its failure keeps it open for another reset_timeout.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=120, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def state(self):
+        """Returns "closed", "open" or "half-open"."""
+        if self._opened_at is None:
+            return "closed"
+        if self._probing or self._clock() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow_request(self):
+        """Returns whether a ticker may be fetched now."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self):
+        self._consecutive_failures += 1
+        if self._probing or self._consecutive_failures >= self.failure_threshold:
+            self._opened_at = self._clock()
+        self._probing = False
+
+class NewsFetcher:
+    """
+    Fetches the news of tickers with a per-request deadline, jittered exponential backoff
+    between attempts, a deadline for the whole cycle and a circuit breaker. Requests run on a
+    long-lived worker thread and share one HTTP session, so its connections are reused. A worker
+    whose call overruns its deadline is abandoned and replaced, so no fetch queues behind it.
+    Outcomes are collected for the end-of-cycle summary.
+
+    fetch_func(ticker) can replace the Yahoo Finance source, e.g. with a fake in tests.
+    """
+
+    def __init__(self, fetch_func=None, request_timeout=15, cycle_timeout=2700, max_attempts=3,
+                 backoff_base=1.0, backoff_max=10.0, breaker=None, sleep=time.sleep, clock=time.monotonic):
+        self.session = None
+        if fetch_func is None:
+            self.session = CappedSession(request_timeout, impersonate="chrome")
+            fetch_func = self._fetch_from_yahoo
+        self._fetch_func = fetch_func
+        self._worker = None
+        self.request_timeout = request_timeout
+        self.cycle_timeout = cycle_timeout
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker(clock=clock)
+        self._sleep = sleep
+        self._clock = clock
+        self._cycle_deadline = None
+        self.outcomes = {}
+
+    def _fetch_from_yahoo(self, ticker):
+        return yf.Ticker(ticker, session=self.session).news
+
+    def _call_with_timeout(self, ticker, timeout):
+        """
+        Runs one fetch on the worker thread and waits at most timeout seconds for it. A call that
+        hangs is abandoned together with its worker; the next fetch starts on a fresh one.
+        """
+        if self._worker is None:
+            self._worker = _FetchWorker()
+        future = self._worker.submit(self._fetch_func, ticker)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self._worker.stop()
+            self._worker = None
+            raise
+
+    def _backoff_delay(self, attempt):
+        """Exponential backoff with jitter, so retries of many tickers do not line up."""
+        cap = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        return random.uniform(cap / 2, cap)
+
+    def start_cycle(self):
+        """Starts the cycle deadline and clears the outcomes of the previous cycle."""
+        self._cycle_deadline = self._clock() + self.cycle_timeout
+        self.outcomes = {}
+
+    def _fail(self, ticker, outcome, reason):
+        self.outcomes[ticker] = {"outcome": outcome, "reason": reason}
+        raise FetchError(ticker, outcome, reason)
+
+    def fetch(self, ticker):
+        """Returns the news list of ticker, or raises FetchError once it is late, failed or skipped."""
+        if self._cycle_deadline is None:
+            self.start_cycle()
+        if self._clock() >= self._cycle_deadline:
+            self._fail(ticker, "skipped", "cycle deadline exceeded")
+        if not self.breaker.allow_request():
+            self._fail(ticker, "skipped", "circuit breaker open")
+
+        outcome, reason = None, None
+        for attempt in range(1, self.max_attempts + 1):
+            timeout = min(self.request_timeout, self._cycle_deadline - self._clock())
+            if timeout <= 0:
+                break
+            try:
+                news = self._call_with_timeout(ticker, timeout)
+                self.breaker.record_success()
+                self.outcomes[ticker] = {"outcome": "ok", "attempts": attempt}
+                return news or []
+            except FutureTimeoutError:
+                outcome, reason = "late", f"no response within {timeout:.1f}s"
+            except Exception as e:
+                outcome, reason = "failed", f"{type(e).__name__}: {e}"
+
+            if attempt < self.max_attempts:
+                delay = self._backoff_delay(attempt)
+                if self._clock() + delay >= self._cycle_deadline:
+                    break
+                self._sleep(delay)
+
+        if outcome is None:
+            self._fail(ticker, "skipped", "cycle deadline exceeded")
+        self.breaker.record_failure()
+        self._fail(ticker, outcome, reason)
+
+    def record_failure(self, ticker, reason):
+        """Marks a fetched ticker as failed, e.g. when its news could not be processed."""
+        self.outcomes[ticker] = {"outcome": "failed", "reason": reason}
+
+    def summary(self):
+        """Groups the tickers of the cycle by outcome."""
+        grouped = {"ok": [], "late": [], "failed": [], "skipped": []}
+        for ticker, result in self.outcomes.items():
+            grouped[result["outcome"]].append(ticker)
+        return grouped
+
+    def print_summary(self):
+        """Prints the outcome counts of the cycle and the reason for every ticker that was not ok."""
+        summary = self.summary()
+        print(f"Fetch summary: {len(summary['ok'])} ok, {len(summary['late'])} late, "
+              f"{len(summary['failed'])} failed, {len(summary['skipped'])} skipped")
+        for outcome in ("late", "failed", "skipped"):
+            for ticker in summary[outcome]:
+                print(f"  {outcome}: {ticker} ({self.outcomes[ticker]['reason']})")
+        return summary
+
+    def close(self):
+        """Stops the worker thread without waiting for a call still in progress, then closes the shared HTTP session."""
+        if self._worker is not None:
+            self._worker.stop()
+            self._worker = None
+        if self.session is not None:
+            self.session.close()
@@ -0,0 +1,353 @@
+import json
+import math
+import os
+import re
+import struct
+from datetime import datetime
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+QUERY_PATTERN = re.compile(r'"([^"]*)"|(\S+)')
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Binary layout of the search section of a snapshot (see encode_search_index).
+SECTION_MAGIC = b"SIDX"
+SECTION_HEADER = struct.Struct("<4sIIQIIIIII")
+DOC_ENTRY = struct.Struct("<IIIddI")  # blob offset, blob length, ticker number, timestamp, score, length
+TERM_ENTRY = struct.Struct("<IHII")  # term offset, term length, document count, postings block offset
+
+def tokenize(text):
+    """Splits text into lowercase alphanumeric terms."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+def parse_query(query):
+    """
+    Parses a query into clauses. Quoted text becomes a phrase clause; a bare word becomes a
+    term clause, unless it tokenizes into several terms (e.g. "u.s."), which are then a phrase.
+    """
+    clauses = []
+    for match in QUERY_PATTERN.finditer(query):
+        tokens = tokenize(match.group(1) if match.group(1) is not None else match.group(2))
+        if tokens:
+            clauses.append(tokens)
+    return clauses
+
+def _parse_timestamp(date_str):
+    """Returns the POSIX timestamp of an ISO date string, or None if it cannot be parsed."""
+    try:
+        return datetime.fromisoformat(date_str.replace('Z', '+00:00')).timestamp()
+    except (AttributeError, ValueError):
+        return None
+
+class _SearchableIndex:
+    """
+    Query evaluation shared by the in-memory and the memory-mapped index. Subclasses provide
+    _postings(term) -> {doc: positions} or None, _doc_meta(doc) -> (ticker, timestamp, score,
+    length), _doc(doc) -> stored article fields and _totals() -> (document count, total length).
+    """
+
+    def search(self, query, tickers=None, start=None, end=None, limit=20):
+        """
+        Returns the documents matching every clause of query, ranked by BM25, together with
+        the match count and average sentiment of the matching articles per ticker.
+        start and end are POSIX timestamps bounding the article date (inclusive).
+        """
+        clauses = parse_query(query)
+        terms = {token for clause in clauses for token in clause}
+        postings = {term: self._postings(term) for term in terms}
+        if not clauses or any(term_postings is None for term_postings in postings.values()):
+            return {"total_matches": 0, "results": [], "tickers": []}
+
+        ticker_filter = {ticker.upper() for ticker in tickers} if tickers else None
+        rarest_term = min(terms, key=lambda term: len(postings[term]))
+        candidates = []
+        for doc in postings[rarest_term]:
+            ticker, timestamp, sentiment_score, length = self._doc_meta(doc)
+            if ticker_filter is not None and ticker not in ticker_filter:
+                continue
+            if start is not None or end is not None:
+                if timestamp is None:
+                    continue
+                if (start is not None and timestamp < start) or (end is not None and timestamp > end):
+                    continue
+            if all(doc in postings[term] for term in terms) and all(
+                len(clause) == 1 or _matches_phrase(postings, doc, clause) for clause in clauses
+            ):
+                candidates.append((doc, ticker, sentiment_score, length))
+
+        total_docs, total_length = self._totals()
+        average_length = total_length / total_docs if total_docs else 0
+        scored = []
+        for doc, _, _, length in candidates:
+            length_norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length) if average_length else BM25_K1
+            score = 0
+            for term in terms:
+                document_frequency = len(postings[term])
+                idf = math.log(1 + (total_docs - document_frequency + 0.5) / (document_frequency + 0.5))
+                term_frequency = len(postings[term][doc])
+                score += idf * term_frequency * (BM25_K1 + 1) / (term_frequency + length_norm)
+            scored.append((score, doc))
+        scored.sort(key=lambda x: (-x[0], x[1]))
+
+        ticker_matches = {}
+        ticker_scores = {}
+        for _, ticker, sentiment_score, _ in candidates:
+            ticker_matches[ticker] = ticker_matches.get(ticker, 0) + 1
+            if sentiment_score is not None:
+                ticker_scores.setdefault(ticker, []).append(sentiment_score)
+        ticker_aggregates = []
+        for ticker, matches in sorted(ticker_matches.items(), key=lambda x: (-x[1], x[0])):
+            scores = ticker_scores.get(ticker, [])
+            ticker_aggregates.append({
+                "ticker": ticker,
+                "matches": matches,
+                "average_sentiment": sum(scores) / len(scores) if scores else 0,
+            })
+
+        results = []
+        for score, doc in scored[:limit]:
+            fields = self._doc(doc)
+            results.append({
+                "ticker": fields["ticker"],
+                "id": fields["id"],
+                "summary": fields["summary"],
+                "date": fields["date"],
+                "sentiment-score": fields["sentiment-score"],
+                "score": score,
+            })
+        return {"total_matches": len(candidates), "results": results, "tickers": ticker_aggregates}
+
+def _matches_phrase(postings, doc, tokens):
+    """Checks whether the tokens appear consecutively in the document."""
+    following = [set(postings[token][doc]) for token in tokens[1:]]
+    return any(
+        all(start + offset + 1 in positions for offset, positions in enumerate(following))
+        for start in postings[tokens[0]][doc]
+    )
+
+class SearchIndex(_SearchableIndex):
+    """
+    A positional inverted index over the stored news summaries of all tickers.
+    Documents are keyed by "TICKER/article-id", since one article can belong to several tickers.
+    """
+
+    def __init__(self, docs=None, postings=None):
+        self.docs = docs or {}
+        self.postings = postings or {}
+        self._ticker_docs = {}
+        self._total_length = 0
+        for key, doc in self.docs.items():
+            self._ticker_docs.setdefault(doc["ticker"], set()).add(key)
+            self._total_length += doc["length"]
+
+    @classmethod
+    def load(cls, index_file):
+        """Loads the index from index_file, or returns an empty index if it is missing or corrupted."""
+        if not os.path.exists(index_file):
+            return cls()
+        with open(index_file, "r") as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError:
+                print(f"Warning: Search index {index_file} is corrupted. Rebuilding.")
+                return cls()
+        return cls(data.get("docs"), data.get("postings"))
+
+    def save(self, index_file):
+        """Writes the index next to index_file and swaps it in atomically."""
+        temp_file = f"{index_file}.tmp"
+        with open(temp_file, "w") as f:
+            json.dump({"docs": self.docs, "postings": self.postings}, f, separators=(",", ":"))
+        os.replace(temp_file, index_file)
+
+    def add_article(self, ticker, item):
+        """Indexes one stored news item of ticker."""
+        key = f"{ticker}/{item['id']}"
+        if key in self.docs:
+            self.remove_article(key)
+        tokens = tokenize(item.get("summary") or "")
+        self.docs[key] = {
+            "ticker": ticker,
+            "id": item["id"],
+            "summary": item.get("summary", ""),
+            "date": item.get("date"),
+            "timestamp": _parse_timestamp(item.get("date")),
+            "sentiment-score": item.get("sentiment-score"),
+            "length": len(tokens),
+        }
+        for position, token in enumerate(tokens):
+            self.postings.setdefault(token, {}).setdefault(key, []).append(position)
+        self._ticker_docs.setdefault(ticker, set()).add(key)
+        self._total_length += len(tokens)
+
+    def remove_article(self, key):
+        """Removes one document and its postings from the index."""
+        doc = self.docs.pop(key, None)
+        if doc is None:
+            return
+        for token in set(tokenize(doc["summary"])):
+            term_postings = self.postings.get(token)
+            if term_postings is not None:
+                term_postings.pop(key, None)
+                if not term_postings:
+                    del self.postings[token]
+        self._ticker_docs.get(doc["ticker"], set()).discard(key)
+        self._total_length -= doc["length"]
+
+    def sync_ticker(self, ticker_symbol, news_list):
+        """
+        Brings the documents of a ticker in line with its stored news: expired articles are
+        removed, new ones are added and the scores of the remaining ones are refreshed.
+        Returns the number of added and removed documents.
+        """
+        ticker = ticker_symbol.upper()
+        current = {
+            f"{ticker}/{item['id']}": item
+            for item in news_list
+            if isinstance(item, dict) and 'id' in item
+        }
+        indexed = self._ticker_docs.get(ticker, set())
+        expired = indexed - current.keys()
+        for key in expired:
+            self.remove_article(key)
+        added = 0
+        for key, item in current.items():
+            if key in self.docs:
+                self.docs[key]["sentiment-score"] = item.get("sentiment-score")
+            else:
+                self.add_article(ticker, item)
+                added += 1
+        return added, len(expired)
+
+    def sync_directory(self, news_dir):
+        """Synchronizes the index with every stored ticker file in news_dir."""
+        for name in sorted(os.listdir(news_dir)):
+            if not name.endswith("_news.json"):
+                continue
+            with open(os.path.join(news_dir, name), "r") as f:
+                try:
+                    data = json.load(f)
+                except json.JSONDecodeError:
+                    print(f"Warning: Skipping corrupted {name} while indexing.")
+                    continue
+            self.sync_ticker(data.get("ticker") or name[:-len("_news.json")], data.get("news", []))
+
+    def _postings(self, term):
+        return self.postings.get(term)
+
+    def _doc_meta(self, key):
+        doc = self.docs[key]
+        return doc["ticker"], doc["timestamp"], doc["sentiment-score"], doc["length"]
+
+    def _doc(self, key):
+        return self.docs[key]
+
+    def _totals(self):
+        return len(self.docs), self._total_length
+
+def encode_search_index(index):
+    """
+    Packs a SearchIndex into the binary search section of a snapshot, which MappedSearchIndex
+    queries in place. Layout (offsets relative to the section start):
+    header, ticker list (JSON), document table, term table sorted by term, postings blocks
+    (per term: document numbers, position start offsets, positions; all uint32) and a blob
+    with the stored article fields (JSON per document) and the term strings.
+    """
+    doc_keys = sorted(index.docs)
+    doc_numbers = {key: number for number, key in enumerate(doc_keys)}
+    tickers = sorted({doc["ticker"] for doc in index.docs.values()})
+    ticker_numbers = {ticker: number for number, ticker in enumerate(tickers)}
+    blob = bytearray()
+
+    doc_table = bytearray()
+    for key in doc_keys:
+        doc = index.docs[key]
+        fields = json.dumps({name: doc[name] for name in ("ticker", "id", "summary", "date", "sentiment-score")},
+                            separators=(",", ":")).encode("utf-8")
+        timestamp = doc["timestamp"] if doc["timestamp"] is not None else math.nan
+        sentiment_score = doc["sentiment-score"] if doc["sentiment-score"] is not None else math.nan
+        doc_table += DOC_ENTRY.pack(len(blob), len(fields), ticker_numbers[doc["ticker"]], timestamp, sentiment_score, doc["length"])
+        blob += fields
+
+    term_table = bytearray()
+    postings_region = bytearray()
+    for term in sorted(index.postings, key=lambda t: t.encode("utf-8")):
+        term_postings = sorted((doc_numbers[key], positions) for key, positions in index.postings[term].items())
+        term_bytes = term.encode("utf-8")
+        term_table += TERM_ENTRY.pack(len(blob), len(term_bytes), len(term_postings), len(postings_region))
+        blob += term_bytes
+        starts = [0]
+        for _, positions in term_postings:
+            starts.append(starts[-1] + len(positions))
+        postings_region += struct.pack(f"<{len(term_postings)}I", *(number for number, _ in term_postings))
+        postings_region += struct.pack(f"<{len(starts)}I", *starts)
+        postings_region += struct.pack(f"<{starts[-1]}I", *(p for _, positions in term_postings for p in positions))
+
+    tickers_bytes = json.dumps(tickers, separators=(",", ":")).encode("utf-8")
+    tickers_offset = SECTION_HEADER.size
+    doc_table_offset = tickers_offset + len(tickers_bytes)
+    term_table_offset = doc_table_offset + len(doc_table)
+    postings_offset = term_table_offset + len(term_table)
+    blob_offset = postings_offset + len(postings_region)
+    header = SECTION_HEADER.pack(SECTION_MAGIC, len(doc_keys), len(term_table) // TERM_ENTRY.size, index._total_length,
+                                 tickers_offset, len(tickers_bytes), doc_table_offset, term_table_offset,
+                                 postings_offset, blob_offset)
+    return bytes(header + tickers_bytes + doc_table + term_table + postings_region + blob)
+
+class MappedSearchIndex(_SearchableIndex):
+    """
+    Queries the search section of a snapshot in place. Only the ticker list is decoded up
+    front; terms are found by binary search over the sorted term table, and only the postings
+    of the query terms and the fields of the returned articles are read per query, so the
+    index lives in the shared page cache rather than in each worker's heap.
+    """
+
+    def __init__(self, buffer):
+        self._buffer = buffer
+        (magic, self._doc_count, self._term_count, self._total_length, tickers_offset, tickers_length,
+         self._doc_table_offset, self._term_table_offset, self._postings_offset, self._blob_offset) = SECTION_HEADER.unpack_from(buffer, 0)
+        if magic != SECTION_MAGIC:
+            raise ValueError("Not a search index section")
+        self._tickers = json.loads(bytes(buffer[tickers_offset:tickers_offset + tickers_length]))
+
+    def _find_term(self, term):
+        """Returns the term table entry of term, or None."""
+        target = term.encode("utf-8")
+        lo, hi = 0, self._term_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            entry = TERM_ENTRY.unpack_from(self._buffer, self._term_table_offset + mid * TERM_ENTRY.size)
+            start = self._blob_offset + entry[0]
+            candidate = bytes(self._buffer[start:start + entry[1]])
+            if candidate == target:
+                return entry
+            if candidate < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def _postings(self, term):
+        entry = self._find_term(term)
+        if entry is None:
+            return None
+        _, _, count, block_offset = entry
+        offset = self._postings_offset + block_offset
+        numbers = struct.unpack_from(f"<{count}I", self._buffer, offset)
+        starts = struct.unpack_from(f"<{count + 1}I", self._buffer, offset + 4 * count)
+        positions = struct.unpack_from(f"<{starts[-1]}I", self._buffer, offset + 4 * (2 * count + 1))
+        return {number: positions[starts[i]:starts[i + 1]] for i, number in enumerate(numbers)}
+
+    def _doc_meta(self, number):
+        _, _, ticker_number, timestamp, sentiment_score, length = DOC_ENTRY.unpack_from(
+            self._buffer, self._doc_table_offset + number * DOC_ENTRY.size)
+        return (self._tickers[ticker_number], None if math.isnan(timestamp) else timestamp,
+                None if math.isnan(sentiment_score) else sentiment_score, length)
+
+    def _doc(self, number):
+        blob_offset, blob_length = DOC_ENTRY.unpack_from(self._buffer, self._doc_table_offset + number * DOC_ENTRY.size)[:2]
+        start = self._blob_offset + blob_offset
+        return json.loads(bytes(self._buffer[start:start + blob_length]))
+
+    def _totals(self):
+        return self._doc_count, self._total_length
@@ -1,7 +1,13 @@
 import numpy as np
+import torch
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 from scipy.special import softmax
 
+MODEL_NAME = "ProsusAI/finbert"
+FORMULA_VERSION = 1
+# Stored with every scored article so stale scores can be found and re-scored.
+SCORING_VERSION = f"{MODEL_NAME}@formula-{FORMULA_VERSION}"
+
 class SentimentAnalyzer:
     """
     A class for analyzing sentiment using the FinBERT model.
@@ -12,8 +18,8 @@ class SentimentAnalyzer:
         Initializes the SentimentAnalyzer by loading the model and tokenizer.
         """
         print("Loading FinBERT model...")
-        self.tokenizer = AutoTokenizer.from_pretrained("ProsusAI/finbert")
-        self.model = AutoModelForSequenceClassification.from_pretrained("ProsusAI/finbert")
+        self.tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+        self.model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
 
     def __del__(self):
         """
@@ -30,13 +36,34 @@ class SentimentAnalyzer:
         inputs = self.tokenizer(text, return_tensors="pt", truncation=True, padding=True)
         outputs = self.model(**inputs)
         scores = softmax(outputs.logits.detach().numpy(), axis=1)
-        scores_list = scores[0].tolist()
+        return self._score_from_probabilities(scores[0])
+
+    def analyze_sentiments(self, texts, batch_size=32):
+        """
+        Analyzes a list of texts in batches and returns their sentiment scores in the same order.
+        """
+        final_scores = []
+        with torch.no_grad():
+            for start in range(0, len(texts), batch_size):
+                batch = texts[start:start + batch_size]
+                inputs = self.tokenizer(batch, return_tensors="pt", truncation=True, padding=True)
+                outputs = self.model(**inputs)
+                scores = softmax(outputs.logits.numpy(), axis=1)
+                final_scores.extend(self._score_from_probabilities(row) for row in scores)
+        return final_scores
+
+    @staticmethod
+    def _score_from_probabilities(probabilities):
+        """
+        Combines the positive, negative and neutral probabilities into a single score.
+        """
+        scores_list = probabilities.tolist()
 
         positive = scores_list[0]
         negative = scores_list[1]
         neutral = scores_list[2]
 
-        dominant_index = np.argmax(scores)
+        dominant_index = np.argmax(probabilities)
 
         final_score = 0
 
@@ -46,6 +73,5 @@ class SentimentAnalyzer:
             final_score = (-negative) + positive + (neutral/2)
         else:  # Dominantly neutral
             final_score = (positive - negative)/2
-        
-        #print(f"\n{text}\npositive: {positive}, neutral: {neutral}, negative: {negative}\nfinal score: {final_score}")
+
         return final_score
\ No newline at end of file
@@ -0,0 +1,162 @@
+import json
+import mmap
+import os
+import struct
+import time
+from search_index import SearchIndex, encode_search_index
+
+MAGIC = b"SMSNAP1\n"
+HEADER = struct.Struct("<8sQI")  # magic, generation, index length
+CURRENT_FILE = "CURRENT"
+KEEP_GENERATIONS = 2
+CHECK_INTERVAL = 1.0  # seconds between checks for a newer generation
+
+def _read_current_name(snapshot_dir):
+    """Returns the file name of the current snapshot generation, or None."""
+    try:
+        with open(os.path.join(snapshot_dir, CURRENT_FILE), "r") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def _compact_json(filepath):
+    """Reads a JSON file and returns it re-encoded without whitespace, or None if it is unreadable."""
+    try:
+        with open(filepath, "r") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Warning: Skipping {filepath} in snapshot: {e}")
+        return None
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+def publish_snapshot(data_dir):
+    """
+    Packs the stock list, recommendations, every ticker document and the search index in
+    data_dir into one immutable binary snapshot and points the CURRENT file at it.
+
+    Layout: header (magic, generation, index length), a JSON index mapping keys to
+    [offset, length] pairs, then the payloads back to back. All payloads are JSON, except
+    "search", which is the binary section written by encode_search_index.
+    """
+    snapshot_dir = os.path.join(data_dir, "snapshot")
+    news_dir = os.path.join(data_dir, "news_data")
+    os.makedirs(snapshot_dir, exist_ok=True)
+
+    payloads = {}
+    for key, filename in (("stock", "stocklist.json"), ("recommendations", "recommendations.json")):
+        payload = _compact_json(os.path.join(data_dir, filename))
+        if payload is not None:
+            payloads[key] = payload
+    if os.path.isdir(news_dir):
+        for name in sorted(os.listdir(news_dir)):
+            if name.endswith("_news.json"):
+                payload = _compact_json(os.path.join(news_dir, name))
+                if payload is not None:
+                    payloads[f"news/{name[:-len('_news.json')]}"] = payload
+
+    # The search index goes into the snapshot as well, so workers query it in place.
+    index_file = os.path.join(data_dir, "search_index.json")
+    if os.path.exists(index_file):
+        search_index = SearchIndex.load(index_file)
+    else:
+        search_index = SearchIndex()
+        if os.path.isdir(news_dir):
+            search_index.sync_directory(news_dir)
+    payloads["search"] = encode_search_index(search_index)
+
+    previous_name = _read_current_name(snapshot_dir)
+    generation = int(previous_name.split("-")[1].split(".")[0]) + 1 if previous_name else 1
+
+    # Offsets depend on the index length, so grow the index until it fits its own estimate.
+    index_length = 0
+    while True:
+        offset = HEADER.size + index_length
+        index = {}
+        for key, payload in payloads.items():
+            index[key] = [offset, len(payload)]
+            offset += len(payload)
+        index_bytes = json.dumps(index, separators=(",", ":")).encode("utf-8")
+        if len(index_bytes) <= index_length:
+            index_bytes = index_bytes.ljust(index_length)
+            break
+        index_length = len(index_bytes)
+
+    name = f"snapshot-{generation:08d}.bin"
+    path = os.path.join(snapshot_dir, name)
+    with open(f"{path}.tmp", "wb") as f:
+        f.write(HEADER.pack(MAGIC, generation, index_length))
+        f.write(index_bytes)
+        for payload in payloads.values():
+            f.write(payload)
+    os.replace(f"{path}.tmp", path)
+
+    current_path = os.path.join(snapshot_dir, CURRENT_FILE)
+    with open(f"{current_path}.tmp", "w") as f:
+        f.write(name)
+    os.replace(f"{current_path}.tmp", current_path)
+
+    old_snapshots = sorted(n for n in os.listdir(snapshot_dir) if n.startswith("snapshot-") and n.endswith(".bin"))
+    for old_name in old_snapshots[:-KEEP_GENERATIONS]:
+        try:
+            os.remove(os.path.join(snapshot_dir, old_name))
+        except OSError:
+            pass  # Still mapped by a worker on platforms that forbid it; removed next time.
+
+    print(f"Snapshot generation {generation} published to {path}")
+    return path
+
+class Snapshot:
+    """
+    A read-only, memory-mapped snapshot generation. Payloads are returned as memoryview
+    slices of the mapping, so the pages are shared between all worker processes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.generation, index_length = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a snapshot file")
+        self._index = json.loads(self._mmap[HEADER.size:HEADER.size + index_length])
+        self._view = memoryview(self._mmap)
+
+    def keys(self):
+        """Returns the keys of all payloads in the snapshot."""
+        return self._index.keys()
+
+    def get(self, key):
+        """Returns the JSON payload stored under key as a memoryview, or None."""
+        entry = self._index.get(key)
+        if entry is None:
+            return None
+        offset, length = entry
+        return self._view[offset:offset + length]
+
+class SnapshotReader:
+    """
+    Follows the CURRENT snapshot generation in snapshot_dir. A new generation is mapped
+    when CURRENT changes; the old mapping is released once no response references it.
+    """
+
+    def __init__(self, snapshot_dir):
+        self.snapshot_dir = snapshot_dir
+        self._snapshot = None
+        self._snapshot_name = None
+        self._next_check = 0
+
+    def current(self):
+        """Returns the current Snapshot, or None if none has been published yet."""
+        now = time.monotonic()
+        if now < self._next_check:
+            return self._snapshot
+        self._next_check = now + CHECK_INTERVAL
+
+        name = _read_current_name(self.snapshot_dir)
+        if name is not None and name != self._snapshot_name:
+            try:
+                self._snapshot = Snapshot(os.path.join(self.snapshot_dir, name))
+                self._snapshot_name = name
+            except (OSError, ValueError, struct.error) as e:
+                print(f"Warning: Could not map snapshot {name}: {e}")
+        return self._snapshot
@@ -2,12 +2,24 @@ import unittest
 import test_utils
 import test_api
 import test_analyser
+import test_backfill
+import test_snapshot
+import test_search
+import test_aggregates
+import test_coalescing
+import test_fetcher
 
 if __name__ == "__main__":
     test_suite = unittest.TestSuite()
     test_suite.addTest(unittest.defaultTestLoader.loadTestsFromModule(test_api))
     test_suite.addTest(unittest.defaultTestLoader.loadTestsFromModule(test_utils))
     test_suite.addTest(unittest.defaultTestLoader.loadTestsFromModule(test_analyser))
+    test_suite.addTest(unittest.defaultTestLoader.loadTestsFromModule(test_backfill))
+    test_suite.addTest(unittest.defaultTestLoader.loadTestsFromModule(test_snapshot))
+    test_suite.addTest(unittest.defaultTestLoader.loadTestsFromModule(test_search))
+    test_suite.addTest(unittest.defaultTestLoader.loadTestsFromModule(test_aggregates))
+    test_suite.addTest(unittest.defaultTestLoader.loadTestsFromModule(test_coalescing))
+    test_suite.addTest(unittest.defaultTestLoader.loadTestsFromModule(test_fetcher))
     runner = unittest.TextTestRunner(verbosity=2)
     result = runner.run(test_suite)
 
@@ -0,0 +1,132 @@
+import unittest
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+from datetime import datetime, timezone, timedelta
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from api_handler import app
+import api_handler
+from aggregates import ScoreIndex, bucket_start
+from news_collector import _calculate_weighted_average, _calculate_average_daily_sentiments
+
+TEST_API_KEY = "twetArxt5425AgesR"
+
+def get_relative_date_iso(days_ago=0, hours_ago=0):
+    date = datetime.now(timezone.utc) - timedelta(days=days_ago, hours=hours_ago)
+    return date.isoformat(timespec='seconds').replace('+00:00', 'Z')
+
+def make_news_list():
+    today_date_str = get_relative_date_iso(0)[:10]
+    return [
+        {"date": f"{today_date_str}T00:00:01Z", "sentiment-score": 0.5},
+        {"date": f"{today_date_str}T00:00:02Z", "sentiment-score": 0.6},
+        {"date": get_relative_date_iso(1), "sentiment-score": 0.8},
+        {"date": get_relative_date_iso(2), "sentiment-score": -0.2},
+        {"date": get_relative_date_iso(4), "sentiment-score": 0.4},
+        {"date": get_relative_date_iso(6), "sentiment-score": -0.7},
+        {"date": get_relative_date_iso(8), "sentiment-score": 0.9},
+        {"date": "invalid-date", "sentiment-score": 0.3},
+    ]
+
+class TestScoreIndex(unittest.TestCase):
+
+    def test_defaults_match_stored_aggregates(self):
+        news_list = make_news_list()
+        stats = ScoreIndex(news_list).window_stats(bucket_start(time.time(), "daily"), 7, "daily")
+        self.assertAlmostEqual(stats["weighted_average_sentiment"], _calculate_weighted_average(news_list), places=7)
+        daily = [b["average_sentiment"] for b in stats["buckets"]]
+        for actual, expected in zip(daily, _calculate_average_daily_sentiments(news_list)):
+            self.assertAlmostEqual(actual, expected, places=7)
+        self.assertEqual(stats["total_news"], 6)
+
+    def test_exponential_kernel(self):
+        news_list = [
+            {"date": get_relative_date_iso(0), "sentiment-score": 1.0},
+            {"date": get_relative_date_iso(2), "sentiment-score": -1.0},
+        ]
+        stats = ScoreIndex(news_list).window_stats(bucket_start(time.time(), "daily"), 7, "daily", "exponential", half_life=2)
+        self.assertAlmostEqual(stats["weighted_average_sentiment"], (1.0 - 0.5) / (1.0 + 0.5), places=7)
+        self.assertAlmostEqual(stats["average_sentiment"], 0, places=7)
+
+    def test_hourly_buckets(self):
+        now = time.time()
+        news_list = [
+            {"date": get_relative_date_iso(hours_ago=0), "sentiment-score": 0.4},
+            {"date": get_relative_date_iso(hours_ago=3), "sentiment-score": 0.2},
+            {"date": get_relative_date_iso(hours_ago=30), "sentiment-score": 0.9},
+        ]
+        stats = ScoreIndex(news_list).window_stats(bucket_start(now, "hourly"), 24, "hourly")
+        self.assertEqual(len(stats["buckets"]), 24)
+        self.assertEqual(stats["total_news"], 2)
+        self.assertEqual(stats["buckets"][3]["count"], 1)
+        self.assertAlmostEqual(stats["buckets"][3]["weight"], 1 - 3 * 0.15, places=7)
+
+    def test_linear_weight_never_negative(self):
+        news_list = [{"date": get_relative_date_iso(10), "sentiment-score": 1.0}]
+        stats = ScoreIndex(news_list).window_stats(bucket_start(time.time(), "daily"), 14, "daily")
+        self.assertEqual(stats["buckets"][10]["weight"], 0)
+        self.assertEqual(stats["weighted_average_sentiment"], 0)
+
+class TestAggregatesAPI(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.src_dir = os.path.join(self.temp_dir, "src")
+        self.news_dir = os.path.join(self.temp_dir, "data", "news_data")
+        os.makedirs(self.src_dir)
+        os.makedirs(self.news_dir)
+        for ticker in ("AAPL", "MSFT"):
+            with open(os.path.join(self.news_dir, f"{ticker.lower()}_news.json"), "w") as f:
+                json.dump({"ticker": ticker, "news": make_news_list()}, f)
+        self.original_api_script_dir = api_handler.script_dir
+        api_handler.script_dir = self.src_dir
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        api_handler.script_dir = self.original_api_script_dir
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_ticker_aggregates_defaults(self):
+        response = self.client.get("/aggregates/aapl", params={"api_key": TEST_API_KEY})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["ticker"], "AAPL")
+        self.assertEqual(len(data["buckets"]), 7)
+        self.assertAlmostEqual(data["weighted_average_sentiment"], _calculate_weighted_average(make_news_list()), places=7)
+
+    def test_ticker_aggregates_custom_window_is_memoized(self):
+        params = {"window": 3, "bucket": "daily", "kernel": "exponential", "half_life": 1.5, "api_key": TEST_API_KEY}
+        self.client.get("/aggregates/aapl", params=params)
+        hits = api_handler._cached_window_stats.cache_info().hits
+        response = self.client.get("/aggregates/aapl", params=params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["buckets"]), 3)
+        self.assertEqual(api_handler._cached_window_stats.cache_info().hits, hits + 1)
+
+    def test_all_ticker_aggregates(self):
+        response = self.client.get("/aggregates", params={"bucket": "hourly", "window": 48, "api_key": TEST_API_KEY})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item["ticker"] for item in response.json()], ["AAPL", "MSFT"])
+
+    def test_ticker_aggregates_not_found(self):
+        response = self.client.get("/aggregates/googl", params={"api_key": TEST_API_KEY})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {"detail": "News data not found for this ticker"})
+
+    def test_invalid_parameters(self):
+        response = self.client.get("/aggregates/aapl", params={"kernel": "gaussian", "api_key": TEST_API_KEY})
+        self.assertEqual(response.status_code, 422)
+        response = self.client.get("/aggregates/aapl", params={"window": 0, "api_key": TEST_API_KEY})
+        self.assertEqual(response.status_code, 422)
+
+    def test_invalid_key(self):
+        response = self.client.get("/aggregates", params={"api_key": "invalidKey123"})
+        self.assertEqual(response.status_code, 401)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+from datetime import datetime, timezone, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from backfill import backfill_scores, rescore_ticker_file
+from sentiment_analyser import SCORING_VERSION
+from data_lock import data_lock, LockHeldError
+
+def get_relative_date_iso(days_ago):
+    date = datetime.now(timezone.utc) - timedelta(days=days_ago)
+    return date.isoformat(timespec='seconds').replace('+00:00', 'Z')
+
+class FakeAnalyzer:
+    """Scores every text with a fixed value and records how it was called."""
+
+    def __init__(self, score=0.4):
+        self.score = score
+        self.calls = []
+
+    def analyze_sentiments(self, texts, batch_size=32):
+        self.calls.append(list(texts))
+        return [self.score for _ in texts]
+
+class TestBackfill(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.news_dir = os.path.join(self.temp_dir, "news_data")
+        os.makedirs(self.news_dir)
+        self.checkpoint_file = os.path.join(self.temp_dir, "backfill_checkpoint.json")
+        for ticker in ("AAPL", "MSFT"):
+            data = {
+                "ticker": ticker,
+                "total_news": 2,
+                "average_sentiment": -0.5,
+                "weighted_average_sentiment": -0.5,
+                "average_daily_sentiments": [-0.5, 0, 0, 0, 0, 0, 0],
+                "news": [
+                    {"id": f"{ticker}-1", "summary": "Old news", "date": get_relative_date_iso(0), "sentiment-score": -0.5},
+                    {"id": f"{ticker}-2", "summary": "Older news", "date": get_relative_date_iso(1), "sentiment-score": -0.5},
+                ],
+            }
+            with open(self.news_file(ticker), "w") as f:
+                json.dump(data, f)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def news_file(self, ticker):
+        return os.path.join(self.news_dir, f"{ticker.lower()}_news.json")
+
+    def test_rescore_rewrites_scores_versions_and_aggregates(self):
+        rescored = rescore_ticker_file(self.news_file("AAPL"), FakeAnalyzer(0.4), batch_size=8)
+        self.assertEqual(rescored, 2)
+        with open(self.news_file("AAPL"), "r") as f:
+            data = json.load(f)
+        for item in data["news"]:
+            self.assertEqual(item["sentiment-score"], 0.4)
+            self.assertEqual(item["scoring-version"], SCORING_VERSION)
+        self.assertAlmostEqual(data["average_sentiment"], 0.4, places=7)
+        self.assertAlmostEqual(data["weighted_average_sentiment"], 0.4, places=7)
+        self.assertAlmostEqual(data["average_daily_sentiments"][0], 0.4, places=7)
+
+    def test_rescore_skips_current_version_unless_forced(self):
+        rescore_ticker_file(self.news_file("AAPL"), FakeAnalyzer(0.4), batch_size=8)
+        analyzer = FakeAnalyzer(0.9)
+        self.assertEqual(rescore_ticker_file(self.news_file("AAPL"), analyzer, batch_size=8), 0)
+        self.assertEqual(analyzer.calls, [])
+        self.assertEqual(rescore_ticker_file(self.news_file("AAPL"), analyzer, batch_size=8, force=True), 2)
+
+    def test_backfill_resumes_from_checkpoint(self):
+        with open(self.checkpoint_file, "w") as f:
+            json.dump({"scoring_version": SCORING_VERSION, "completed": ["aapl_news.json"]}, f)
+        analyzer = FakeAnalyzer(0.4)
+        total = backfill_scores(analyzer, self.news_dir, self.checkpoint_file)
+        self.assertEqual(total, 2)
+        self.assertEqual(analyzer.calls, [["Old news", "Older news"]])
+        with open(self.news_file("AAPL"), "r") as f:
+            self.assertEqual(json.load(f)["news"][0]["sentiment-score"], -0.5)
+        self.assertFalse(os.path.exists(self.checkpoint_file))
+
+    def test_backfill_ignores_checkpoint_of_other_version(self):
+        with open(self.checkpoint_file, "w") as f:
+            json.dump({"scoring_version": "old-model@formula-0", "completed": ["aapl_news.json"]}, f)
+        total = backfill_scores(FakeAnalyzer(0.4), self.news_dir, self.checkpoint_file)
+        self.assertEqual(total, 4)
+
+    def test_failed_ticker_keeps_checkpoint(self):
+        with open(self.news_file("MSFT"), "w") as f:
+            f.write("{broken")
+        total = backfill_scores(FakeAnalyzer(0.4), self.news_dir, self.checkpoint_file, force=True)
+        self.assertEqual(total, 2)
+        with open(self.checkpoint_file, "r") as f:
+            self.assertEqual(json.load(f)["completed"], ["aapl_news.json"])
+
+        analyzer = FakeAnalyzer(0.4)
+        backfill_scores(analyzer, self.news_dir, self.checkpoint_file, force=True)
+        self.assertEqual(analyzer.calls, [])
+        self.assertTrue(os.path.exists(self.checkpoint_file))
+
+    def test_data_lock_refuses_while_held(self):
+        lock_file = os.path.join(self.temp_dir, "collector.lock")
+        with data_lock(lock_file):
+            with self.assertRaises(LockHeldError):
+                with data_lock(lock_file, blocking=False):
+                    pass
+        with data_lock(lock_file, blocking=False):
+            pass
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+import os
+import sys
+import time
+import asyncio
+import threading
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from api_handler import app
+import api_handler
+
+TEST_API_KEY = "twetArxt5425AgesR"
+
+class TestCoalescing(unittest.TestCase):
+
+    def setUp(self):
+        self.original_stats = dict(api_handler._load_stats)
+        self.original_max_in_flight = api_handler.MAX_IN_FLIGHT_LOADS
+        for name in api_handler._load_stats:
+            api_handler._load_stats[name] = 0
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def tearDown(self):
+        api_handler._load_stats.update(self.original_stats)
+        api_handler.MAX_IN_FLIGHT_LOADS = self.original_max_in_flight
+
+    def slow_load(self, value):
+        with self.lock:
+            self.calls += 1
+        time.sleep(0.05)
+        return value
+
+    def failing_load(self):
+        time.sleep(0.05)
+        raise ValueError("broken file")
+
+    def test_concurrent_requests_share_one_load(self):
+        async def burst():
+            return await asyncio.gather(*(api_handler._single_flight("aapl", self.slow_load, {"ticker": "AAPL"}) for _ in range(20)))
+
+        results = asyncio.run(burst())
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(result == {"ticker": "AAPL"} for result in results))
+        self.assertEqual(api_handler._load_stats["loads"], 1)
+        self.assertEqual(api_handler._load_stats["coalesced"], 19)
+        self.assertEqual(api_handler._in_flight, {})
+
+    def test_different_keys_load_separately(self):
+        async def burst():
+            return await asyncio.gather(
+                api_handler._single_flight("aapl", self.slow_load, 1),
+                api_handler._single_flight("msft", self.slow_load, 2),
+            )
+
+        self.assertEqual(asyncio.run(burst()), [1, 2])
+        self.assertEqual(self.calls, 2)
+
+    def test_errors_are_shared(self):
+        async def burst():
+            return await asyncio.gather(
+                *(api_handler._single_flight("broken", self.failing_load) for _ in range(3)),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(burst())
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+        self.assertEqual(api_handler._load_stats["loads"], 1)
+
+    def test_load_shedding(self):
+        api_handler.MAX_IN_FLIGHT_LOADS = 1
+
+        async def burst():
+            return await asyncio.gather(
+                api_handler._single_flight("aapl", self.slow_load, 1),
+                api_handler._single_flight("aapl", self.slow_load, 1),
+                api_handler._single_flight("msft", self.slow_load, 2),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(burst())
+        self.assertEqual(results[:2], [1, 1])
+        self.assertIsInstance(results[2], HTTPException)
+        self.assertEqual(results[2].status_code, 503)
+        self.assertEqual(results[2].headers, {"Retry-After": str(api_handler.RETRY_AFTER_SECONDS)})
+        self.assertEqual(api_handler._load_stats["shed"], 1)
+
+    def test_queue_depth_counts_waiting_loads(self):
+        release = threading.Event()
+
+        def blocked_load(value):
+            release.wait()
+            return value
+
+        async def burst():
+            loads = [
+                asyncio.ensure_future(api_handler._single_flight(f"ticker-{i}", blocked_load, i))
+                for i in range(api_handler.READ_POOL_WORKERS + 2)
+            ]
+            await asyncio.sleep(0.1)
+            counts = dict(api_handler._pool_counts)
+            release.set()
+            await asyncio.gather(*loads)
+            return counts
+
+        counts = asyncio.run(burst())
+        self.assertEqual(counts, {"queued": 2, "running": api_handler.READ_POOL_WORKERS})
+        self.assertEqual(api_handler._pool_counts, {"queued": 0, "running": 0})
+
+    def test_metrics_endpoint(self):
+        asyncio.run(api_handler._single_flight("aapl", self.slow_load, 1))
+        client = TestClient(app)
+        response = client.get("/metrics", params={"api_key": TEST_API_KEY})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["loads"], 1)
+        self.assertEqual(data["queue_depth"], 0)
+        self.assertEqual(data["running_loads"], 0)
+        self.assertEqual(data["coalescing_ratio"], 0)
+        self.assertEqual(data["read_pool_workers"], api_handler.READ_POOL_WORKERS)
+
+    def test_metrics_invalid_key(self):
+        client = TestClient(app)
+        response = client.get("/metrics", params={"api_key": "invalidKey123"})
+        self.assertEqual(response.status_code, 401)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,250 @@
+import unittest
+import os
+import sys
+import json
+import time
+import shutil
+import subprocess
+import tempfile
+import threading
+from datetime import datetime, timezone, timedelta
+from unittest import mock
+from curl_cffi import requests as curl_requests
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from news_fetcher import NewsFetcher, CircuitBreaker, CappedSession, FetchError
+import news_collector
+
+def get_relative_date_iso(days_ago):
+    date = datetime.now(timezone.utc) - timedelta(days=days_ago)
+    return date.isoformat(timespec='seconds').replace('+00:00', 'Z')
+
+class FakeNewsSource:
+    """
+    Stands in for Yahoo Finance. Per ticker it can add latency, raise errors for the first
+    failures calls, or hang until released.
+    """
+
+    def __init__(self, latency=None, failures=None, hang=()):
+        self.latency = latency or {}
+        self.failures = failures or {}
+        self.hang = set(hang)
+        self.calls = {}
+        self.threads = []
+        self.released = threading.Event()
+
+    def __call__(self, ticker):
+        self.calls[ticker] = self.calls.get(ticker, 0) + 1
+        self.threads.append(threading.get_ident())
+        if ticker in self.hang:
+            self.released.wait()
+        time.sleep(self.latency.get(ticker, 0))
+        if self.calls[ticker] <= self.failures.get(ticker, 0):
+            raise ConnectionError(f"injected error for {ticker}")
+        return [{
+            "id": f"{ticker}-1",
+            "content": {"pubDate": get_relative_date_iso(0), "summary": f"{ticker} news"},
+        }]
+
+class FakeAnalyzer:
+
+    def analyze_sentiment(self, text):
+        return 0.25
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestNewsFetcher(unittest.TestCase):
+
+    def make_fetcher(self, source, **kwargs):
+        kwargs.setdefault("request_timeout", 0.1)
+        kwargs.setdefault("sleep", lambda delay: None)
+        return NewsFetcher(fetch_func=source, **kwargs)
+
+    def test_success(self):
+        fetcher = self.make_fetcher(FakeNewsSource())
+        news = fetcher.fetch("AAPL")
+        self.assertEqual(news[0]["id"], "AAPL-1")
+        self.assertEqual(fetcher.summary()["ok"], ["AAPL"])
+
+    def test_retries_transient_errors_with_backoff(self):
+        source = FakeNewsSource(failures={"AAPL": 2})
+        delays = []
+        fetcher = self.make_fetcher(source, sleep=delays.append, backoff_base=1.0, backoff_max=10.0)
+        fetcher.fetch("AAPL")
+        self.assertEqual(source.calls["AAPL"], 3)
+        self.assertEqual(fetcher.outcomes["AAPL"], {"outcome": "ok", "attempts": 3})
+        self.assertEqual(len(delays), 2)
+        self.assertTrue(0.5 <= delays[0] <= 1.0)
+        self.assertTrue(1.0 <= delays[1] <= 2.0)
+
+    def test_failed_after_all_attempts(self):
+        source = FakeNewsSource(failures={"AAPL": 5})
+        fetcher = self.make_fetcher(source, max_attempts=3)
+        with self.assertRaises(FetchError) as context:
+            fetcher.fetch("AAPL")
+        self.assertEqual(context.exception.outcome, "failed")
+        self.assertIn("injected error", context.exception.reason)
+        self.assertEqual(source.calls["AAPL"], 3)
+
+    def test_requests_share_one_worker_thread(self):
+        source = FakeNewsSource()
+        fetcher = self.make_fetcher(source)
+        for ticker in ("AAPL", "MSFT", "NVDA"):
+            fetcher.fetch(ticker)
+        fetcher.close()
+        self.assertEqual(len(set(source.threads)), 1)
+        self.assertNotEqual(source.threads[0], threading.get_ident())
+
+    def test_session_caps_request_timeouts(self):
+        session = CappedSession(2)
+        try:
+            with mock.patch.object(curl_requests.Session, "request") as request:
+                session.get("https://example.com", timeout=30)
+                session.post("https://example.com", timeout=1)
+                session.get("https://example.com")
+            self.assertEqual([call.kwargs["timeout"] for call in request.call_args_list], [2, 1, 2])
+        finally:
+            session.close()
+
+    def test_hanging_request_is_late_and_does_not_block(self):
+        source = FakeNewsSource(hang=["AAPL"])
+        fetcher = self.make_fetcher(source, request_timeout=0.1, max_attempts=2)
+        try:
+            start = time.monotonic()
+            with self.assertRaises(FetchError) as context:
+                fetcher.fetch("AAPL")
+            self.assertLess(time.monotonic() - start, 1)
+            self.assertEqual(context.exception.outcome, "late")
+            for ticker in ("MSFT", "NVDA"):
+                self.assertEqual(fetcher.fetch(ticker)[0]["id"], f"{ticker}-1")
+            self.assertFalse(source.released.is_set())
+            self.assertEqual(fetcher.summary(), {"ok": ["MSFT", "NVDA"], "late": ["AAPL"], "failed": [], "skipped": []})
+            start = time.monotonic()
+            fetcher.close()
+            self.assertLess(time.monotonic() - start, 0.1)
+        finally:
+            source.released.set()
+
+    def test_hung_fetch_does_not_block_exit(self):
+        script = (
+            "import threading\n"
+            "from news_fetcher import NewsFetcher, FetchError\n"
+            "fetcher = NewsFetcher(fetch_func=lambda ticker: threading.Event().wait(), request_timeout=0.1, max_attempts=1)\n"
+            "try:\n"
+            "    fetcher.fetch('AAPL')\n"
+            "except FetchError:\n"
+            "    pass\n"
+            "fetcher.close()\n"
+        )
+        src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+        result = subprocess.run([sys.executable, "-c", script], cwd=src_dir, timeout=20)
+        self.assertEqual(result.returncode, 0)
+
+    def test_cycle_deadline_skips_remaining_tickers(self):
+        source = FakeNewsSource(latency={"AAPL": 0.15})
+        fetcher = self.make_fetcher(source, request_timeout=1, cycle_timeout=0.1, max_attempts=1)
+        fetcher.start_cycle()
+        with self.assertRaises(FetchError):
+            fetcher.fetch("AAPL")
+        with self.assertRaises(FetchError) as context:
+            fetcher.fetch("MSFT")
+        self.assertEqual(context.exception.outcome, "skipped")
+        self.assertNotIn("MSFT", source.calls)
+        self.assertEqual(fetcher.summary(), {"ok": [], "late": ["AAPL"], "failed": [], "skipped": ["MSFT"]})
+
+    def test_circuit_breaker_skips_tickers_while_open(self):
+        source = FakeNewsSource(failures={"A": 9, "B": 9, "C": 9})
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60, clock=clock)
+        fetcher = self.make_fetcher(source, max_attempts=1, breaker=breaker, clock=clock)
+        for ticker in ("A", "B"):
+            with self.assertRaises(FetchError):
+                fetcher.fetch(ticker)
+        self.assertEqual(breaker.state, "open")
+        with self.assertRaises(FetchError) as context:
+            fetcher.fetch("C")
+        self.assertEqual(context.exception.reason, "circuit breaker open")
+        self.assertNotIn("C", source.calls)
+
+        clock.now = 61
+        self.assertEqual(breaker.state, "half-open")
+        fetcher.fetch("D")
+        self.assertEqual(breaker.state, "closed")
+
+    def test_failed_probe_reopens_breaker(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60, clock=clock)
+        breaker.record_failure()
+        clock.now = 61
+        self.assertTrue(breaker.allow_request())
+        self.assertFalse(breaker.allow_request())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+
+class TestCollectorFetchStage(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.src_dir = os.path.join(self.temp_dir, "src")
+        self.news_dir = os.path.join(self.temp_dir, "data", "news_data")
+        os.makedirs(self.src_dir)
+        os.makedirs(self.news_dir)
+        self.original_script_dir = news_collector.script_dir
+        news_collector.script_dir = self.src_dir
+        self.cutoff = datetime.now(timezone.utc) - timedelta(days=7)
+
+    def tearDown(self):
+        news_collector.script_dir = self.original_script_dir
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def load(self, ticker):
+        with open(os.path.join(self.news_dir, f"{ticker.lower()}_news.json"), "r") as f:
+            return json.load(f)
+
+    def test_new_news_are_saved(self):
+        fetcher = NewsFetcher(fetch_func=FakeNewsSource(), request_timeout=0.1)
+        news_collector.get_stock_news_json("AAPL", FakeAnalyzer(), self.cutoff, fetcher)
+        data = self.load("AAPL")
+        self.assertEqual(data["total_news"], 1)
+        self.assertEqual(data["news"][0]["sentiment-score"], 0.25)
+
+    def test_failed_fetch_still_expires_old_news(self):
+        existing = {"ticker": "AAPL", "news": [
+            {"id": "old", "summary": "Old", "date": get_relative_date_iso(10), "sentiment-score": 0.1},
+            {"id": "recent", "summary": "Recent", "date": get_relative_date_iso(1), "sentiment-score": 0.3},
+        ]}
+        with open(os.path.join(self.news_dir, "aapl_news.json"), "w") as f:
+            json.dump(existing, f)
+        fetcher = NewsFetcher(fetch_func=FakeNewsSource(failures={"AAPL": 9}), request_timeout=0.1,
+                              max_attempts=2, sleep=lambda delay: None)
+        news_collector.get_stock_news_json("AAPL", FakeAnalyzer(), self.cutoff, fetcher)
+        data = self.load("AAPL")
+        self.assertEqual([item["id"] for item in data["news"]], ["recent"])
+        self.assertEqual(fetcher.summary()["failed"], ["AAPL"])
+
+    def test_malformed_articles_are_skipped(self):
+        source = FakeNewsSource()
+        articles = [{"id": "broken"}, {"id": "no-date", "content": {"summary": "x"}}] + source("AAPL")
+        fetcher = NewsFetcher(fetch_func=lambda ticker: articles, request_timeout=0.1)
+        news_collector.get_stock_news_json("AAPL", FakeAnalyzer(), self.cutoff, fetcher)
+        self.assertEqual([item["id"] for item in self.load("AAPL")["news"]], ["AAPL-1"])
+        self.assertEqual(fetcher.summary()["ok"], ["AAPL"])
+
+    def test_processing_error_is_reported_as_failed(self):
+        class BrokenAnalyzer:
+            def analyze_sentiment(self, text):
+                raise RuntimeError("model not loaded")
+
+        fetcher = NewsFetcher(fetch_func=FakeNewsSource(), request_timeout=0.1)
+        news_collector.get_stock_news_json("AAPL", BrokenAnalyzer(), self.cutoff, fetcher)
+        self.assertEqual(fetcher.summary()["failed"], ["AAPL"])
+        self.assertEqual(fetcher.outcomes["AAPL"]["reason"], "RuntimeError: model not loaded")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+from datetime import datetime
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from api_handler import app
+import api_handler
+from search_index import SearchIndex, MappedSearchIndex, encode_search_index, parse_query
+import snapshot
+from snapshot import publish_snapshot
+
+TEST_API_KEY = "twetArxt5425AgesR"
+
+mock_aapl_news = [
+    {"id": "1", "summary": "New tariffs hit Apple supply chain.", "date": "2025-04-07T12:00:00Z", "sentiment-score": -0.6},
+    {"id": "2", "summary": "Apple faces antitrust probe over the App Store.", "date": "2025-04-08T12:00:00Z", "sentiment-score": -0.4},
+    {"id": "3", "summary": "Analysts say the tariff impact on Apple is limited.", "date": "2025-04-09T12:00:00Z", "sentiment-score": 0.2},
+]
+mock_msft_news = [
+    {"id": "4", "summary": "Microsoft shrugs off the tariff worries.", "date": "2025-04-08T12:00:00Z", "sentiment-score": 0.5},
+]
+
+def timestamp(date_str):
+    return datetime.fromisoformat(date_str.replace('Z', '+00:00')).timestamp()
+
+class TestSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = SearchIndex()
+        self.index.sync_ticker("AAPL", mock_aapl_news)
+        self.index.sync_ticker("MSFT", mock_msft_news)
+
+    def test_parse_query(self):
+        self.assertEqual(parse_query('tariff "supply chain" U.S.'), [["tariff"], ["supply", "chain"], ["u", "s"]])
+
+    def test_term_search_with_ticker_aggregates(self):
+        result = self.index.search("tariff")
+        self.assertEqual(result["total_matches"], 2)
+        self.assertEqual({(r["ticker"], r["id"]) for r in result["results"]}, {("AAPL", "3"), ("MSFT", "4")})
+        self.assertEqual(result["tickers"][0]["ticker"], "AAPL")
+        self.assertAlmostEqual(result["tickers"][0]["average_sentiment"], 0.2, places=7)
+
+    def test_phrase_search(self):
+        self.assertEqual(self.index.search('"antitrust probe"')["total_matches"], 1)
+        self.assertEqual(self.index.search('"probe antitrust"')["total_matches"], 0)
+
+    def test_all_clauses_must_match(self):
+        self.assertEqual(self.index.search("tariff microsoft")["total_matches"], 1)
+        self.assertEqual(self.index.search("tariff unknownterm")["total_matches"], 0)
+
+    def test_ticker_and_date_filters(self):
+        self.assertEqual(self.index.search("tariff", tickers=["msft"])["total_matches"], 1)
+        result = self.index.search("tariff", start=timestamp("2025-04-09T00:00:00Z"))
+        self.assertEqual([r["id"] for r in result["results"]], ["3"])
+        result = self.index.search("tariff", end=timestamp("2025-04-08T23:59:59Z"))
+        self.assertEqual([r["id"] for r in result["results"]], ["4"])
+
+    def test_sync_removes_expired_and_refreshes_scores(self):
+        rescored = dict(mock_aapl_news[2], **{"sentiment-score": 0.9})
+        added, removed = self.index.sync_ticker("AAPL", [mock_aapl_news[1], rescored])
+        self.assertEqual((added, removed), (0, 1))
+        self.assertEqual(self.index.search("tariffs")["total_matches"], 0)
+        self.assertNotIn("chain", self.index.postings)
+        self.assertEqual(self.index.search("tariff", tickers=["AAPL"])["results"][0]["sentiment-score"], 0.9)
+
+    def test_save_and_load(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            index_file = os.path.join(temp_dir, "search_index.json")
+            self.index.save(index_file)
+            loaded = SearchIndex.load(index_file)
+            self.assertEqual(loaded.search("tariff"), self.index.search("tariff"))
+            loaded.sync_ticker("MSFT", [])
+            self.assertEqual(loaded.search("tariff")["total_matches"], 1)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def test_mapped_index_matches_in_memory_index(self):
+        mapped = MappedSearchIndex(memoryview(encode_search_index(self.index)))
+        queries = [("tariff", {}), ('"antitrust probe"', {}), ("apple", {"tickers": ["AAPL"]}),
+                   ("tariff", {"start": timestamp("2025-04-09T00:00:00Z")}), ("unknownterm", {})]
+        for query, filters in queries:
+            expected = self.index.search(query, **filters)
+            actual = mapped.search(query, **filters)
+            self.assertEqual(actual["total_matches"], expected["total_matches"])
+            self.assertEqual(actual["tickers"], expected["tickers"])
+            self.assertEqual(
+                sorted((r["ticker"], r["id"], round(r["score"], 9), r["summary"]) for r in actual["results"]),
+                sorted((r["ticker"], r["id"], round(r["score"], 9), r["summary"]) for r in expected["results"]),
+            )
+
+class TestSearchAPI(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.src_dir = os.path.join(self.temp_dir, "src")
+        self.data_dir = os.path.join(self.temp_dir, "data")
+        os.makedirs(self.src_dir)
+        os.makedirs(os.path.join(self.data_dir, "news_data"))
+        for ticker, news in (("AAPL", mock_aapl_news), ("MSFT", mock_msft_news)):
+            with open(os.path.join(self.data_dir, "news_data", f"{ticker.lower()}_news.json"), "w") as f:
+                json.dump({"ticker": ticker, "news": news}, f)
+        self.original_api_script_dir = api_handler.script_dir
+        api_handler.script_dir = self.src_dir
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        api_handler.script_dir = self.original_api_script_dir
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_search_builds_index_from_news_files(self):
+        response = self.client.get("/search", params={"q": "tariff", "api_key": TEST_API_KEY})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["total_matches"], 2)
+
+    def test_search_uses_saved_index_with_filters(self):
+        index = SearchIndex()
+        index.sync_ticker("AAPL", mock_aapl_news)
+        index.save(os.path.join(self.data_dir, "search_index.json"))
+        response = self.client.get("/search", params={
+            "q": "apple", "ticker": ["AAPL"], "start": "2025-04-08T00:00:00Z", "limit": 1, "api_key": TEST_API_KEY,
+        })
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["query"], "apple")
+        self.assertEqual(data["total_matches"], 2)
+        self.assertEqual(len(data["results"]), 1)
+        self.assertEqual(data["tickers"], [{"ticker": "AAPL", "matches": 2, "average_sentiment": -0.1}])
+
+    def test_search_fallback_index_follows_news_files(self):
+        self.client.get("/search", params={"q": "tariff", "api_key": TEST_API_KEY})
+        with open(os.path.join(self.data_dir, "news_data", "msft_news.json"), "w") as f:
+            json.dump({"ticker": "MSFT", "news": []}, f)
+        os.utime(os.path.join(self.data_dir, "news_data", "msft_news.json"), ns=(1, 1))
+        response = self.client.get("/search", params={"q": "tariff", "api_key": TEST_API_KEY})
+        self.assertEqual(response.json()["total_matches"], 1)
+
+    def test_search_from_snapshot(self):
+        original_check_interval = snapshot.CHECK_INTERVAL
+        snapshot.CHECK_INTERVAL = 0
+        try:
+            publish_snapshot(self.data_dir)
+            os.remove(os.path.join(self.data_dir, "news_data", "msft_news.json"))
+            response = self.client.get("/search", params={"q": "tariff", "ticker": ["MSFT"], "api_key": TEST_API_KEY})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([r["id"] for r in response.json()["results"]], ["4"])
+            self.assertIsInstance(api_handler._load_search_index(), MappedSearchIndex)
+        finally:
+            snapshot.CHECK_INTERVAL = original_check_interval
+
+    def test_search_invalid_key(self):
+        response = self.client.get("/search", params={"q": "tariff", "api_key": "invalidKey123"})
+        self.assertEqual(response.status_code, 401)
+
+    def test_search_missing_query(self):
+        response = self.client.get("/search", params={"api_key": TEST_API_KEY})
+        self.assertEqual(response.status_code, 422)
+
+if __name__ == "__main__":
+    unittest.main()
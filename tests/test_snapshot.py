@@ -0,0 +1,97 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from api_handler import app
+import api_handler
+import snapshot
+from snapshot import publish_snapshot, SnapshotReader
+
+TEST_API_KEY = "twetArxt5425AgesR"
+
+mock_stocklist_data = [{"ticker": "AAPL", "name": "Apple Inc."}]
+mock_recommendations_data = {"top_5_best": [{"ticker": "AAPL", "weighted_average": 0.8}], "top_5_worst": []}
+mock_aapl_news_data = {"ticker": "AAPL", "total_news": 1, "average_sentiment": 0.5, "news": [{"id": "123", "summary": "Good news", "date": "2025-04-08T12:00:00Z", "sentiment-score": 0.5}]}
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.src_dir = os.path.join(self.temp_dir, "src")
+        self.data_dir = os.path.join(self.temp_dir, "data")
+        self.snapshot_dir = os.path.join(self.data_dir, "snapshot")
+        os.makedirs(self.src_dir)
+        os.makedirs(os.path.join(self.data_dir, "news_data"))
+        self.write_json(os.path.join(self.data_dir, "stocklist.json"), mock_stocklist_data)
+        self.write_json(os.path.join(self.data_dir, "recommendations.json"), mock_recommendations_data)
+        self.write_json(os.path.join(self.data_dir, "news_data", "aapl_news.json"), mock_aapl_news_data)
+
+        self.original_check_interval = snapshot.CHECK_INTERVAL
+        snapshot.CHECK_INTERVAL = 0
+        self.original_api_script_dir = api_handler.script_dir
+        api_handler.script_dir = self.src_dir
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        snapshot.CHECK_INTERVAL = self.original_check_interval
+        api_handler.script_dir = self.original_api_script_dir
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def write_json(self, path, data):
+        with open(path, "w") as f:
+            json.dump(data, f, indent=4)
+
+    def test_publish_and_read_back(self):
+        publish_snapshot(self.data_dir)
+        current = SnapshotReader(self.snapshot_dir).current()
+        self.assertEqual(current.generation, 1)
+        self.assertEqual(json.loads(bytes(current.get("stock"))), mock_stocklist_data)
+        self.assertEqual(json.loads(bytes(current.get("recommendations"))), mock_recommendations_data)
+        self.assertEqual(json.loads(bytes(current.get("news/aapl"))), mock_aapl_news_data)
+        self.assertIsNone(current.get("news/msft"))
+
+    def test_reader_switches_generations(self):
+        publish_snapshot(self.data_dir)
+        reader = SnapshotReader(self.snapshot_dir)
+        self.assertEqual(reader.current().generation, 1)
+        self.write_json(os.path.join(self.data_dir, "stocklist.json"), [])
+        publish_snapshot(self.data_dir)
+        self.assertEqual(reader.current().generation, 2)
+        self.assertEqual(json.loads(bytes(reader.current().get("stock"))), [])
+
+    def test_old_generations_are_removed(self):
+        for _ in range(4):
+            publish_snapshot(self.data_dir)
+        snapshots = sorted(name for name in os.listdir(self.snapshot_dir) if name.endswith(".bin"))
+        self.assertEqual(snapshots, ["snapshot-00000003.bin", "snapshot-00000004.bin"])
+
+    def test_corrupted_file_is_left_out(self):
+        with open(os.path.join(self.data_dir, "news_data", "corrupt_news.json"), "w") as f:
+            f.write("{invalid json:")
+        publish_snapshot(self.data_dir)
+        self.assertIsNone(SnapshotReader(self.snapshot_dir).current().get("news/corrupt"))
+
+    def test_api_serves_from_snapshot(self):
+        publish_snapshot(self.data_dir)
+        os.remove(os.path.join(self.data_dir, "news_data", "aapl_news.json"))
+        response = self.client.get("/data/aapl", params={"api_key": TEST_API_KEY})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), mock_aapl_news_data)
+        response = self.client.get("/stock", params={"api_key": TEST_API_KEY})
+        self.assertEqual(response.json(), mock_stocklist_data)
+        response = self.client.get("/recommendations", params={"api_key": TEST_API_KEY})
+        self.assertEqual(response.json(), mock_recommendations_data)
+
+    def test_api_snapshot_ticker_not_found(self):
+        publish_snapshot(self.data_dir)
+        response = self.client.get("/data/msft", params={"api_key": TEST_API_KEY})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {"detail": "News data not found for this ticker"})
+
+if __name__ == "__main__":
+    unittest.main()